@@ -1,16 +1,17 @@
 import re
 
-from utils.connect_qwen import qwen_client
 from utils.log_utils import get_logger
 from config.llm_config import CURR_ENV,ENV_CONFIG
+from config.config import PROMPT_PACK_CONFIG
 from utils.string_util import convert_val
+from utils import llm_gateway
+from utils.prompt_packer import pack_prompt
 
 # MODEL_PATH = 'Qwen2.5-72B-Instruct'
 
 class PrivateApply:
     def __init__(self):
         self.logger = get_logger()
-        self.client = qwen_client()
 
     # 批复信息
     def private_credit_approval(self, com, text, reply_date):
@@ -23,46 +24,41 @@ class PrivateApply:
         以上是银行授信批复内容、批复时间和城投公司名称，请返回一句话总结、提取并返回城投公司的授信批复信息，如果授信额度有多个用途需要逐个列举并尽量使用原文，授信额度用整数表示，不要返回其他内容，返回格式如：X年X月X日，我行同意给予X公司授信额度X万元，用于投资XX。
         """
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user",
                  "content": llm_prompt}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return "\n".join([item.strip() for item in chat_response.choices[0].message.content.split("\n") if item])
-        # return chat_response.choices[0].message.content.strip()
+        return "\n".join([item.strip() for item in chat_content.split("\n") if item])
+        # return chat_content.strip()
 
     # 拟投债券要素接口，获取拟投债券要素，需要将第一段内容也融合进来
     def private_para4(self, text):
         self.logger.info('拟投债券要素接口:')
         # self.logger.debug(text)
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user",
                  "content": "请根据下面的文字，总结债券名称、发行人、争议解决方式、发行规模、发行期限、票面利率、还本付息方式、外部评级、主承销商、承销方式、担保方式、募集资金用途，其余信息无需展示，每样信息占用一行，信息缺失的写无,主承销商不包含联席主承销商，票面（票面利率）也可以用询价区间值，外部评级使用主体评级，发行期限取最具体的信息（如果有）而不取期限限制信息，发行期限优先从【授信申请方案】获取（尽量使用原文数据：" + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return "\n".join([item.strip() for item in chat_response.choices[0].message.content.split("\n") if item])
-        # return chat_response.choices[0].message.content.strip()
+        return "\n".join([item.strip() for item in chat_content.split("\n") if item])
+        # return chat_content.strip()
 
     # 发行人概况
     def private_faxing_condition(self, text):
         self.logger.info('发行人概况接口:')
         # self.logger.debug(text)
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user",
                  "content": "根据以下文字，帮我总结发行人成立日期、注册资本、实收资本、外部评级和持股情况，以几句话总结，不要换行展示，其余信息无需展示。"
@@ -70,10 +66,9 @@ class PrivateApply:
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip()
+        return chat_content.strip()
 
     def get_equity_structure_description(self, search_results: list) -> str:
         """
@@ -98,7 +93,7 @@ class PrivateApply:
                 发行人控股股东为【股东名称】，持股比例为【XX%】，实际控制人为【实际控制人名称】。
                 
                 【检索内容】
-                {str(search_results)[:10000]}
+                {pack_prompt(search_results, budget=PROMPT_PACK_CONFIG.get("equity_structure_budget"))}
                 
                 【要求】
                 1. 直接输出一句话，不需要标题或其他说明
@@ -107,14 +102,11 @@ class PrivateApply:
                 """
             }]
 
-            response = self.client.chat.completions.create(
-                model=ENV_CONFIG.get(CURR_ENV).get("model"),
+            equity_description = self._chat_completion(
                 messages=equity_summary_prompt,
                 temperature=0.2,
                 max_tokens=600
-            )
-
-            equity_description = response.choices[0].message.content.strip()
+            ).strip()
 
             # 清理可能的格式标记
             if equity_description.startswith("```"):
@@ -139,17 +131,15 @@ class PrivateApply:
         # self.logger.debug(text)
         prompt_gaikuang = "请根据下面的发债平台情况，总结发行人总资产和排名情况，只用一句话展示"
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_gaikuang + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip()
+        return chat_content.strip()
 
     # 债券余额
     def private_zhaiquan_yue(self, text):
@@ -159,17 +149,15 @@ class PrivateApply:
                            "并按照如下格式输出,'截至**年*月，发行人债券存量数目一共*只，存量规模为**亿元。其中，公募债券余额为**亿元，占存量规模的*%。"
                            "提供的余额情况如下:")
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_gaikuang + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip()
+        return chat_content.strip()
 
 
 
@@ -183,17 +171,15 @@ class PrivateApply:
                            "并按照如下格式输出,'截至最新，发行人债券存量数目一共*只，存量规模为**亿元。其中，公募债券余额为**亿元，占存量规模的*%。"
                            "提供的表格数据如下:")
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_gaikuang + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip()
+        return chat_content.strip()
 
         # 获取营业收入情况
 
@@ -218,17 +204,15 @@ class PrivateApply:
         ```
         """
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip()
+        return chat_content.strip()
 
     # 获取发行人营业情况总结
     def private_5para_yinye_summary(self, text):
@@ -244,17 +228,15 @@ class PrivateApply:
         提供的内容如下：
         """
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_text + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip()
+        return chat_content.strip()
 
     # 获取发行人总资产情况，对应第六章第一、二段内容
 
@@ -286,19 +268,17 @@ class PrivateApply:
             非流动资产方面，主要包括发放贷款及垫款**亿元、可供出售金融资产**亿元（依次罗列非流动资产金额不小于1的各项）。
         """
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_text + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        res = chat_response.choices[0].message.content.strip()
+        res = chat_content.strip()
         return re.sub(r"\n+", "\n", res)
-        # return chat_response.choices[0].message.content.strip()
+        # return chat_content.strip()
 
     # 获取对应第六章受限资产情况
 
@@ -307,17 +287,15 @@ class PrivateApply:
         # self.logger.debug(text)
         prompt_text = "请根据下面的表格数据，展示受限资产合计数据，限制20个字，金额为亿元，其他信息无需展示："
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_text + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip()
+        return chat_content.strip()
 
     # 获取发行人总资产情况，对应第六章总负债情况
 
@@ -342,17 +320,15 @@ class PrivateApply:
             3.根据【负债各项】列表，从【资产负债表】表格中提取所有负债项目及负债金额，然后计算并筛选出负债金额不小于1的所有项目，禁止遗漏。
             4.根据转换后的数据和单位以及步骤2和步骤3的筛选结果进行总结，总结一句话文本，输出思考过程，并将总结文本放在最后，总结中不要有思考描述。例如：截至**年**月末(如果有时间信息，如果是0x月，转换为x月)，发行人总负债**亿元，资产负债率**%。其中短期借款**亿元、向中央银行借款**亿元(依次罗列所有负债金额不小于1的各项)。
         """
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip().split("\n")[-1].strip("总结：")
+        return chat_content.strip().split("\n")[-1].strip("总结：")
 
     # 获取发行人有息负债情况，对应第六章有息负债
 
@@ -410,17 +386,15 @@ class PrivateApply:
         请确保所有数字格式正确，计算准确，结果应包括计算步骤与总结。
         """
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        tmp_result = chat_response.choices[0].message.content.strip()
+        tmp_result = chat_content.strip()
         summary_start = tmp_result.find("#### 5. 总结")
         summary_start1 = tmp_result.find("### 总结")
         # 如果找到了“### 总结”标签
@@ -459,18 +433,16 @@ class PrivateApply:
         # 2.根据转换后的数据和单位，总结发行人最新一年的对外担保情况，以一段文本展示，不要换行，直接返回文本，包括对外担保余额、占当期末总资产的比例等情况，字数控制在200字左右。在总结中使用转换后的金额和单位，不要再出现旧的金额和单位
         # """
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_text + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip()
-        # res = chat_response.choices[0].message.content.strip()
+        return chat_content.strip()
+        # res = chat_content.strip()
         # match = re.findall("【(.*?)】", res)
         # if match:
         #     return match[0]
@@ -498,17 +470,15 @@ class PrivateApply:
         下面是表格数据：
         """
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_gaikuang + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip()
+        return chat_content.strip()
 
     # 对外担保情况
 
@@ -528,17 +498,15 @@ class PrivateApply:
         ```
         """
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_text + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip()
+        return chat_content.strip()
 
     # 被执行人情况
 
@@ -548,17 +516,15 @@ class PrivateApply:
 
         prompt_beizhixingren = "请根据下面的数据，如果没有数据则直接返回'无被执行人情况数据'；如果有数据则总结欠款人被执行金额情况，时间无需说明，以一段文本展示，字数控制在200字以内，格式如下所示：发行人期末大额应收账款中，欠款人某某公司，经企查查查询，均被列为被执行人，被执行金额分别为多少钱："
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_beizhixingren + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        return chat_response.choices[0].message.content.strip()
+        return chat_content.strip()
 
     # 保证人情况
 
@@ -579,18 +545,16 @@ class PrivateApply:
         下面是保证人信息：
         """
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_gaikuang + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        # return chat_response.choices[0].message.content.strip()
-        return "\n".join([item.strip() for item in chat_response.choices[0].message.content.split("\n") if item])
+        # return chat_content.strip()
+        return "\n".join([item.strip() for item in chat_content.split("\n") if item])
 
     def private_6para_fengxiandian(self, text):
         self.logger.info('风险点接口:')
@@ -607,34 +571,47 @@ class PrivateApply:
         下面是风险信息：
         """
 
-        chat_response = self.client.chat.completions.create(
-            model=ENV_CONFIG.get(CURR_ENV).get("model"),
+        chat_content = self._chat_completion(
             messages=[
                 {"role": "user", "content": prompt_gaikuang + text}
             ],
             temperature=0.2,
             top_p=0.9,
-            max_tokens=8192,
-            stream=False
+            max_tokens=8192
         )
-        # return chat_response.choices[0].message.content.strip()
-        res = "\n".join([item.replace(". ", "、").replace(".", "、").replace("、 ", "、").strip() for item in chat_response.choices[0].message.content.split("\n") if item])
+        # return chat_content.strip()
+        res = "\n".join([item.replace(". ", "、").replace(".", "、").replace("、 ", "、").strip() for item in chat_content.split("\n") if item])
         return convert_val(res)
 
-    def generate(self, prompts, temperature=0):
+    def _chat_completion(self, messages, **params):
+        """调用大模型，返回结果文本；相同模型、消息和参数的结果走磁盘缓存"""
+        return llm_gateway.generate(messages, model=ENV_CONFIG.get(CURR_ENV).get("model"), **params)
+
+    def generate(self, prompts, temperature=0, validate=None):
         try:
-            response = self.client.chat.completions.create(
-                model=ENV_CONFIG.get(CURR_ENV).get("model"),
+            return self._chat_completion(
                 messages=prompts,
                 temperature=temperature,
                 response_format={"type": "json_object"},
+                validate=validate,
                 #timeout=30
             )
-            return response.choices[0].message.content
             # return response.choices[0].message.reasoning_content
         except Exception as e:
             raise Exception(f"An error occurred while calling OpenAI API: {e}")
 
+    async def agenerate(self, prompts, temperature=0, validate=None):
+        try:
+            return await llm_gateway.agenerate(
+                prompts,
+                model=ENV_CONFIG.get(CURR_ENV).get("model"),
+                temperature=temperature,
+                response_format={"type": "json_object"},
+                validate=validate,
+            )
+        except Exception as e:
+            raise Exception(f"An error occurred while calling OpenAI API: {e}")
+
 
 
 
@@ -0,0 +1,216 @@
+"""
+生成基准测试用的合成夹具任务：虚构发行人的募集说明书（最小WordprocessingML，不依赖python-docx）、request.json
+及替代库种子数据，内容均为虚构，不含客户信息
+
+用法：python -m benchmark.make_fixture --fixtures benchmark/fixtures
+"""
+import argparse
+import json
+import os
+import zipfile
+from xml.sax.saxutils import escape
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+TASK_NAME = "synthetic_ctz_001"
+COMPANY_NAME = "江北示范城市建设投资有限公司"
+COMPANY_CODE = "S000000001"
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+CONTENT_TYPES_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>
+<Override PartName="/word/numbering.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.numbering+xml"/>
+</Types>"""
+
+PACKAGE_RELS_XML = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="{PKG_RELS_NS}">
+<Relationship Id="rId1" Type="{R_NS}/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+DOCUMENT_RELS_XML = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="{PKG_RELS_NS}">
+<Relationship Id="rId1" Type="{R_NS}/styles" Target="styles.xml"/>
+<Relationship Id="rId2" Type="{R_NS}/numbering" Target="numbering.xml"/>
+</Relationships>"""
+
+STYLES_XML = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:styles xmlns:w="{W_NS}">
+<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>
+<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/><w:basedOn w:val="Normal"/>
+<w:pPr><w:outlineLvl w:val="0"/></w:pPr></w:style>
+<w:style w:type="paragraph" w:styleId="Heading2"><w:name w:val="heading 2"/><w:basedOn w:val="Normal"/>
+<w:pPr><w:outlineLvl w:val="1"/></w:pPr></w:style>
+<w:style w:type="table" w:default="1" w:styleId="TableNormal"><w:name w:val="Normal Table"/></w:style>
+</w:styles>"""
+
+NUMBERING_XML = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:numbering xmlns:w="{W_NS}"/>"""
+
+# 募集说明书正文：("h1"/"h2"/"p", 文本) 或 ("table", 二维表格)
+PROSPECTUS_BODY = [
+    ("p", COMPANY_NAME),
+    ("p", "2026年面向专业投资者公开发行公司债券（第一期）募集说明书"),
+    ("h1", "第一节 发行概况"),
+    ("h2", "一、本次发行的基本情况"),
+    ("p", "本期债券发行规模不超过人民币10亿元，期限为5年，募集资金扣除发行费用后拟用于偿还有息债务。"),
+    ("h1", "第二节 发行人基本情况"),
+    ("h2", "一、发行人概况"),
+    ("p", f"注册名称：{COMPANY_NAME}"),
+    ("p", "法定代表人：张示例"),
+    ("p", "注册资本：人民币200,000.00万元"),
+    ("p", "实缴资本：人民币200,000.00万元"),
+    ("p", "设立日期：2008年6月18日"),
+    ("p", "统一社会信用代码：91000000MA0000000X"),
+    ("p", "住所：江北省示范市新城区建设大道1号"),
+    ("p", "所属行业：土木工程建筑业"),
+    ("p", "经营范围：城市基础设施建设、土地整理开发、保障性住房建设及运营管理。"),
+    ("h2", "二、发行人的股权结构"),
+    ("p", "截至2025年末，发行人股权结构如下："),
+    ("table", [
+        ["股东名称", "持股比例（%）"],
+        ["示范市人民政府国有资产监督管理委员会", "90.00"],
+        ["江北省财政厅", "10.00"],
+    ]),
+    ("h2", "三、发行人主营业务情况"),
+    ("p", "发行人是示范市最主要的基础设施建设主体，主营业务包括基础设施代建、土地整理及保障房销售。"),
+    ("h1", "第三节 发行人主要财务情况"),
+    ("h2", "一、合并资产负债表"),
+    ("p", "单位：万元"),
+    ("table", [
+        ["项目", "2025年末", "2024年末", "2023年末"],
+        ["货币资金", "325,600.00", "298,400.00", "276,100.00"],
+        ["应收账款", "412,300.00", "385,900.00", "350,200.00"],
+        ["其他应收款", "286,700.00", "270,100.00", "251,800.00"],
+        ["存货", "1,856,400.00", "1,702,300.00", "1,598,600.00"],
+        ["资产总计", "3,512,800.00", "3,268,500.00", "3,047,900.00"],
+        ["短期借款", "126,500.00", "118,200.00", "102,400.00"],
+        ["一年内到期的非流动负债", "215,300.00", "198,600.00", "176,900.00"],
+        ["长期借款", "862,400.00", "801,700.00", "752,300.00"],
+        ["应付债券", "498,000.00", "452,000.00", "410,000.00"],
+        ["负债合计", "1,986,200.00", "1,842,700.00", "1,706,300.00"],
+        ["所有者权益合计", "1,526,600.00", "1,425,800.00", "1,341,600.00"],
+    ]),
+    ("h2", "二、有息负债情况"),
+    ("p", "截至2025年末，发行人有息负债结构如下："),
+    ("p", "单位：万元"),
+    ("table", [
+        ["项目", "金额", "占比（%）"],
+        ["短期借款", "126,500.00", "7.44"],
+        ["一年内到期的非流动负债", "215,300.00", "12.66"],
+        ["长期借款", "862,400.00", "50.71"],
+        ["应付债券", "498,000.00", "29.19"],
+        ["合计", "1,702,200.00", "100.00"],
+    ]),
+    ("h1", "第四节 发行的有关机构"),
+    ("h2", "一、发行人"),
+    ("p", f"名称：{COMPANY_NAME}"),
+    ("p", "联系人：李示例"),
+    ("p", "电话：0000-00000000"),
+    ("h2", "二、主承销商"),
+    ("p", "名称：示范证券股份有限公司"),
+    ("p", "联系人：王示例"),
+]
+
+REQUEST = {"custName": COMPANY_NAME, "reportType": "05", "serialNo": "BENCHMARK-SYNTHETIC-001"}
+
+# 替代库种子数据：表名及列名需出现在structured/models表模型或DAO查询中
+SEED = {
+    "TQ_COMP_INFO": [
+        {"COMPCODE": COMPANY_CODE, "COMPNAME": COMPANY_NAME, "ISVALID": 1, "FOUNDDATE": "20080618",
+         "REGCAPITAL": 200000, "LEGREP": "张示例", "MAJORBIZ": "基础设施代建、土地整理及保障房销售"},
+    ],
+    "TQ_COMP_RELATEDPARTY": [
+        {"COMPCODE": COMPANY_CODE, "RELATYPECODE": "A", "RELANAME": "示范市人民政府国有资产监督管理委员会",
+         "ENTRYDATE": "20250101"},
+    ],
+    "TQ_COMP_CBOARDMAP": [
+        {"COMPCODE": COMPANY_CODE, "BOARDCODE": "1101", "KEYCODE": "990000", "KEYNAME": "江北省"},
+        {"COMPCODE": COMPANY_CODE, "BOARDCODE": "1102", "KEYCODE": "990100", "KEYNAME": "示范市"},
+        {"COMPCODE": COMPANY_CODE, "BOARDCODE": "1103", "KEYCODE": "990102", "KEYNAME": "新城区"},
+    ],
+    "TQ_SK_SHAREHOLDER": [
+        {"COMPCODE": COMPANY_CODE, "ISVALID": 1, "UPDATEDATE": "20260101", "ENDDATE": "20251231",
+         "SHHOLDERCODE": "S000000002", "SHHOLDERNAME": "示范市人民政府国有资产监督管理委员会",
+         "HOLDERAMT": 180000, "HOLDERRTO": 90},
+        {"COMPCODE": COMPANY_CODE, "ISVALID": 1, "UPDATEDATE": "20260101", "ENDDATE": "20251231",
+         "SHHOLDERCODE": "S000000003", "SHHOLDERNAME": "江北省财政厅", "HOLDERAMT": 20000, "HOLDERRTO": 10},
+    ],
+    "TQ_FIN_INBEARDEBT": [
+        {"ITCODE": COMPANY_CODE, "REPORTRANGE": "1", "REPORTDATE": f"{year}1231", "INBEARDEBT": total,
+         "SHTDEBT": short, "SHORTTERMBORR": short, "LTMDEBT": long, "LONGBORR": long}
+        for year, total, short, long in [("2025", 17022000000, 1265000000, 8624000000),
+                                         ("2024", 15705000000, 1182000000, 8017000000),
+                                         ("2023", 14416000000, 1024000000, 7523000000)]
+    ],
+}
+
+
+def _paragraph_xml(text, style_id=None):
+    style = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ""
+    return f'<w:p>{style}<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def _table_xml(rows):
+    grid = "".join('<w:gridCol w:w="2400"/>' for _ in rows[0])
+    body = "".join("<w:tr>" + "".join(f"<w:tc>{_paragraph_xml(cell)}</w:tc>" for cell in row) + "</w:tr>"
+                   for row in rows)
+    return f'<w:tbl><w:tblPr><w:tblStyle w:val="TableNormal"/></w:tblPr><w:tblGrid>{grid}</w:tblGrid>{body}</w:tbl>'
+
+
+def _document_xml(body):
+    style_ids = {"h1": "Heading1", "h2": "Heading2", "p": None}
+    elements = "".join(_table_xml(content) if kind == "table" else _paragraph_xml(content, style_ids[kind])
+                       for kind, content in body)
+    return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<w:document xmlns:w="{W_NS}" xmlns:r="{R_NS}"><w:body>{elements}'
+            f'<w:sectPr><w:pgSz w:w="11906" w:h="16838"/></w:sectPr></w:body></w:document>')
+
+
+def write_docx(path, body):
+    """写出最小的docx文件（正文、样式、编号三个部件）"""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as docx_zip:
+        docx_zip.writestr("[Content_Types].xml", CONTENT_TYPES_XML)
+        docx_zip.writestr("_rels/.rels", PACKAGE_RELS_XML)
+        docx_zip.writestr("word/_rels/document.xml.rels", DOCUMENT_RELS_XML)
+        docx_zip.writestr("word/document.xml", _document_xml(body))
+        docx_zip.writestr("word/styles.xml", STYLES_XML)
+        docx_zip.writestr("word/numbering.xml", NUMBERING_XML)
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def make_fixture(fixtures_dir):
+    """生成合成任务目录及种子数据；已有种子数据时按表合并，同名表以合成数据为准"""
+    task_dir = os.path.join(fixtures_dir, TASK_NAME)
+    os.makedirs(task_dir, exist_ok=True)
+    _write_json(os.path.join(task_dir, "request.json"), REQUEST)
+    write_docx(os.path.join(task_dir, f"{COMPANY_NAME}2026年公司债券募集说明书.docx"), PROSPECTUS_BODY)
+    seed_path = os.path.join(fixtures_dir, "finchinadb_seed.json")
+    seed = {}
+    if os.path.exists(seed_path):
+        with open(seed_path, encoding="utf-8") as f:
+            seed = json.load(f)
+    seed.update(SEED)
+    _write_json(seed_path, seed)
+    return task_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成基准测试合成夹具")
+    parser.add_argument("--fixtures", default=os.path.join(BENCHMARK_DIR, "fixtures"), help="夹具目录")
+    args = parser.parse_args()
+    print(make_fixture(args.fixtures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+本地OpenAI兼容大模型桩服务，用于基准测试：
+按配置延迟返回结果，支持流式；结果优先取桩规则匹配的内容，其次按提示词中【结果输出】模板返回
+"""
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 提示词中的输出模板标记，如【结果输出】【输出】【输出格式】
+OUTPUT_MARKER_PATTERN = re.compile(r"【(?:结果)?输出(?:格式)?】")
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+
+
+def _balanced_json(text, start):
+    """从start处的'{'开始截取括号配平的片段，忽略字符串中的括号"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for idx in range(start, len(text)):
+        char = text[idx]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:idx + 1]
+    return None
+
+
+def _template_content(prompt):
+    """提取提示词中第一个输出标记后的输出模板作为结果，无法解析时返回None"""
+    prompt = prompt.replace("{{", "{").replace("}}", "}")
+    match = OUTPUT_MARKER_PATTERN.search(prompt)
+    if not match:
+        return None
+    start = prompt.find("{", match.end())
+    if start < 0:
+        return None
+    template = _balanced_json(prompt, start)
+    if template is None:
+        return None
+    template = TRAILING_COMMA_PATTERN.sub(r"\1", template)
+    for candidate in (template, template.replace("'", '"')):
+        try:
+            return json.dumps(json.loads(candidate), ensure_ascii=False)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+class MockLLMServer:
+    """
+    :param latency: 每次请求的固定延迟（秒）
+    :param rules: 桩规则 [{"match": 提示词正则, "content": 返回内容}]，按顺序匹配
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, rules=None):
+        self.latency = latency
+        self.rules = [(re.compile(rule["match"], re.S), rule["content"]) for rule in rules or []]
+        self.request_count = 0
+        # 未命中规则且无法解析输出模板、返回"{}"的次数，过多说明基准测试走了与线上不同的异常分支
+        self.fallback_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def reply(self, body):
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        for pattern, content in self.rules:
+            if pattern.search(prompt):
+                return content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            content = _template_content(prompt)
+            if content is None:
+                with self._lock:
+                    self.fallback_count += 1
+                return "{}"
+            return content
+        return "无"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server._lock:
+                    server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                content = server.reply(body)
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+                model = body.get("model", "mock")
+                prompt_tokens = sum(len(str(message.get("content", ""))) for message in body.get("messages", []))
+                if body.get("stream"):
+                    self._send_stream(completion_id, model, content)
+                    return
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content, "reasoning_content": content}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content),
+                              "total_tokens": prompt_tokens + len(content)},
+                })
+
+            def _send_stream(self, completion_id, model, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                chunks = [content[i:i + 64] for i in range(0, len(content), 64)] or [""]
+                for chunk in chunks:
+                    event = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": model,
+                             "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本地大模型桩服务")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    mock_server = MockLLMServer(port=args.port, latency=args.latency).start()
+    print(f"mock llm server: {mock_server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock_server.stop()
@@ -0,0 +1,179 @@
+"""
+端到端基准测试：对夹具任务目录逐个执行 OrganizeDoc → DataDownload → UrbanReport.gen_report，
+大模型使用本地桩服务，数据库使用SQLite替代库，输出各阶段耗时、大模型调用次数、峰值内存及吞吐量
+
+夹具目录结构：
+    fixtures/
+        finchinadb_seed.json        替代库种子数据（可选）
+        llm_rules.json              桩服务规则（可选）[{"match": 提示词正则, "content": 返回内容}]
+        <任务目录>/request.json 及募集说明书等文件，与线上任务目录一致
+
+用法：python -m benchmark.run_benchmark --fixtures benchmark/fixtures --latency 0.2 --repeat 2
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def _peak_rss_mb():
+    # linux下ru_maxrss单位为KB
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _list_tasks(fixtures_dir):
+    return sorted(os.path.join(fixtures_dir, name) for name in os.listdir(fixtures_dir)
+                  if os.path.isfile(os.path.join(fixtures_dir, name, "request.json")))
+
+
+def _prepare_env(args):
+    """需在导入项目模块前设置：数据库地址、缓存开关"""
+    if not args.use_cache:
+        os.environ["LLM_CACHE_BYPASS"] = "1"
+    db_url = args.db_url
+    if not db_url:
+        from benchmark.standin_db import build_standin_db
+        db_path = os.path.join(args.work_dir, "finchinadb.sqlite")
+        db_url = build_standin_db(db_path, os.path.join(args.fixtures, "finchinadb_seed.json"))
+    os.environ["FINCHINA_DB_URL"] = db_url
+    if not args.db_url:
+        # 替代库需模拟DAO查询使用的MySQL函数
+        from benchmark.standin_db import attach_mysql_functions
+        from utils.db_util import engine
+        attach_mysql_functions(engine)
+    return db_url
+
+
+def _point_llm_to(base_url):
+    """将各大模型配置指向桩服务"""
+    from config.config import LLM_CONFIG
+    from config.llm_config import CURR_ENV, ENV_CONFIG
+    ENV_CONFIG[CURR_ENV] = {**ENV_CONFIG[CURR_ENV], "base_url": base_url}
+    LLM_CONFIG["llm"] = {**LLM_CONFIG["llm"], "base_url": base_url}
+
+
+def run_task(task_dir):
+    """执行单个任务，返回各阶段耗时、调用次数及峰值内存"""
+    from data.db_data.ctz_data_download import DataDownload
+    from data.doc_data.organize_doc import OrganizeDoc
+    from generate.generate_report import UrbanReport
+    from utils.file_util import convert_com_name
+    from utils.llm_trace import end_trace, start_trace, trace_stage
+
+    with open(os.path.join(task_dir, "request.json"), "r") as f:
+        request = json.load(f)
+    start_trace(os.path.basename(task_dir))
+    rss = {}
+    error = None
+    start = time.perf_counter()
+    try:
+        with trace_stage("organize"):
+            od = OrganizeDoc(task_dir)
+            # 与 main.process_task 一致：始终整理文档（doc转换、加载募集说明书），再优先使用请求中的客户名称
+            company_name = od.organize()
+        company_name = request.get("custName") or company_name
+        rss["organize"] = _peak_rss_mb()
+        with trace_stage("download"):
+            DataDownload(task_dir).extract_data(convert_com_name(company_name))
+        rss["download"] = _peak_rss_mb()
+        with trace_stage("report"):
+            UrbanReport(request, company_name, task_dir, od.prospectus_doc).gen_report()
+        rss["report"] = _peak_rss_mb()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall_time = time.perf_counter() - start
+    summary = end_trace(os.path.join(task_dir, "llm_trace.json"))
+    stages = [{**stage, "peak_rss_mb": rss.get(stage["stage"])} for stage in summary["stages"]]
+    return {
+        "task": os.path.basename(task_dir),
+        "ok": error is None,
+        "error": error,
+        "wall_time": round(wall_time, 3),
+        "llm_calls": summary["total"]["calls"],
+        "llm_cache_hits": summary["total"]["cache_hits"],
+        "prompt_tokens": summary["total"]["prompt_tokens"],
+        "completion_tokens": summary["total"]["completion_tokens"],
+        "stages": stages,
+    }
+
+
+def run_benchmark(args):
+    os.makedirs(args.work_dir, exist_ok=True)
+    db_url = _prepare_env(args)
+
+    from benchmark.mock_llm_server import MockLLMServer
+    rules_path = os.path.join(args.fixtures, "llm_rules.json")
+    rules = []
+    if os.path.exists(rules_path):
+        with open(rules_path, encoding="utf-8") as f:
+            rules = json.load(f)
+    server = MockLLMServer(latency=args.latency, rules=rules).start()
+    _point_llm_to(server.base_url)
+
+    tasks = _list_tasks(args.fixtures)
+    results = []
+    start = time.perf_counter()
+    try:
+        for round_idx in range(args.repeat):
+            for task in tasks:
+                # 复制到工作目录执行，避免污染夹具
+                task_dir = os.path.join(args.work_dir, f"round{round_idx}", os.path.basename(task))
+                shutil.rmtree(task_dir, ignore_errors=True)
+                shutil.copytree(task, task_dir)
+                result = run_task(task_dir)
+                result["round"] = round_idx
+                results.append(result)
+                print(f"[{round_idx}] {result['task']}: ok={result['ok']} wall={result['wall_time']}s "
+                      f"llm_calls={result['llm_calls']} "
+                      + " ".join(f"{stage['stage']}={stage['latency']}s" for stage in result["stages"]))
+    finally:
+        server.stop()
+    total_time = time.perf_counter() - start
+    succeed = sum(1 for result in results if result["ok"])
+    report = {
+        "db_url": db_url,
+        "llm_latency": args.latency,
+        "tasks": len(tasks),
+        "repeat": args.repeat,
+        "succeed": succeed,
+        "total_time": round(total_time, 3),
+        "reports_per_hour": round(succeed / total_time * 3600, 2) if total_time else 0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "llm_requests": server.request_count,
+        "llm_template_fallbacks": server.fallback_count,
+        "results": results,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="报告生成端到端基准测试")
+    parser.add_argument("--fixtures", default=os.path.join(BENCHMARK_DIR, "fixtures"), help="夹具任务目录")
+    parser.add_argument("--work-dir", default=None, help="工作目录，默认临时目录")
+    parser.add_argument("--latency", type=float, default=0.0, help="桩服务每次请求延迟（秒）")
+    parser.add_argument("--repeat", type=int, default=1, help="重复轮数")
+    parser.add_argument("--db-url", default=None, help="数据库地址，默认根据种子数据创建SQLite替代库")
+    parser.add_argument("--use-cache", action="store_true", help="启用大模型结果缓存")
+    parser.add_argument("--output", default=None, help="结果JSON输出路径")
+    args = parser.parse_args()
+    args.work_dir = args.work_dir or tempfile.mkdtemp(prefix="report_bench_")
+
+    report = run_benchmark(args)
+    print(f"succeed {report['succeed']}/{report['tasks'] * report['repeat']}, total {report['total_time']}s, "
+          f"{report['reports_per_hour']} reports/hour, peak rss {report['peak_rss_mb']}MB, "
+          f"llm requests {report['llm_requests']}, template fallbacks {report['llm_template_fallbacks']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
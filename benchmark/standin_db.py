@@ -0,0 +1,165 @@
+"""
+基于SQLite的finchinadb替代库：按structured/models中的表模型及DAO查询语句建表，并写入夹具中的种子数据；
+DAO查询使用的MySQL函数（IF、REGEXP_REPLACE等）通过SQLite自定义函数模拟
+"""
+import ast
+import datetime
+import importlib
+import json
+import os
+import pkgutil
+import re
+
+from sqlalchemy import MetaData, create_engine, event, inspect, text
+from sqlmodel import SQLModel
+
+import structured.models
+import data.db_access.yjt_data_access.dao as dao_package
+
+# DAO查询中的表名（from/join后以tq_开头的标识符）
+DAO_TABLE_PATTERN = re.compile(r"\b(?:from|join)\s+(tq_\w+)", re.I)
+IDENTIFIER_PATTERN = re.compile(r"(?<![:\w])([A-Za-z_]\w*)\b(?!\s*\()(?!\s*\.)")
+ALIAS_PATTERN = re.compile(r"\b([A-Za-z_]\w*)\s*\.")
+LITERAL_PATTERN = re.compile(r"'[^']*'|\"[^\"]*\"|:\w+")
+SQL_KEYWORDS = {
+    "select", "from", "join", "left", "right", "inner", "outer", "on", "where", "and", "or", "not", "like", "is",
+    "null", "as", "in", "distinct", "order", "by", "desc", "asc", "limit", "group", "having", "case", "when", "then",
+    "else", "end", "over", "partition", "union", "all", "between", "exists",
+}
+
+
+def _load_models():
+    for module_info in pkgutil.iter_modules(structured.models.__path__):
+        importlib.import_module(f"{structured.models.__name__}.{module_info.name}")
+
+
+def _dao_queries():
+    """DAO模块中的全部查询语句"""
+    queries = []
+    for module_info in pkgutil.iter_modules(dao_package.__path__):
+        with open(os.path.join(dao_package.__path__[0], f"{module_info.name}.py"), encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        queries.extend(node.value for node in ast.walk(tree)
+                       if isinstance(node, ast.Constant) and isinstance(node.value, str)
+                       and re.search(r"\bselect\b", node.value, re.I) and DAO_TABLE_PATTERN.search(node.value))
+    return queries
+
+
+def dao_table_columns():
+    """
+    从DAO查询语句推导表结构：语句中出现的列名均加入该语句引用的每张表（多余的列为空，不影响查询）
+    :return: {表名(小写): {列名(大写)}}
+    """
+    tables = {}
+    for query in _dao_queries():
+        body = LITERAL_PATTERN.sub(" ", query)
+        aliases = {alias.lower() for alias in ALIAS_PATTERN.findall(body)}
+        table_names = {name.lower() for name in DAO_TABLE_PATTERN.findall(body)}
+        columns = {identifier.upper() for identifier in IDENTIFIER_PATTERN.findall(body)
+                   if identifier.lower() not in SQL_KEYWORDS | aliases | table_names
+                   and not identifier.isdigit()}
+        for table_name in table_names:
+            tables.setdefault(table_name, set()).update(columns)
+    return tables
+
+
+def _mysql_if(condition, true_value, false_value):
+    return true_value if condition else false_value
+
+
+def _regexp_replace(value, pattern, replacement):
+    return None if value is None else re.sub(pattern, replacement, str(value))
+
+
+def _str_to_date(value, fmt):
+    try:
+        return datetime.datetime.strptime(str(value), fmt).strftime("%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+def _datediff(end, start):
+    try:
+        return (datetime.date.fromisoformat(str(end)[:10]) - datetime.date.fromisoformat(str(start)[:10])).days
+    except (TypeError, ValueError):
+        return None
+
+
+def _right(value, length):
+    return None if value is None else str(value)[-int(length):]
+
+
+def _concat(*values):
+    return None if any(value is None for value in values) else "".join(str(value) for value in values)
+
+
+def register_mysql_functions(dbapi_connection, connection_record=None):
+    """为SQLite连接注册DAO查询用到的MySQL函数"""
+    dbapi_connection.create_function("IF", 3, _mysql_if)
+    dbapi_connection.create_function("REGEXP_REPLACE", 3, _regexp_replace)
+    dbapi_connection.create_function("STR_TO_DATE", 2, _str_to_date)
+    dbapi_connection.create_function("DATEDIFF", 2, _datediff)
+    dbapi_connection.create_function("CURDATE", 0, lambda: datetime.date.today().isoformat())
+    dbapi_connection.create_function("RIGHT", 2, _right)
+    dbapi_connection.create_function("CONCAT", -1, _concat)
+
+
+def attach_mysql_functions(engine):
+    """替代库引擎的每个新连接注册MySQL函数"""
+    event.listen(engine, "connect", register_mysql_functions)
+
+
+def build_standin_db(db_path, seed_path=None):
+    """
+    创建替代库：structured/models表模型建表，DAO查询引用的其他表按推导的列建表（列无类型，按写入值存储），
+    种子数据中的列补充到DAO表中；种子数据中存在未知表时报错
+    :param db_path: SQLite文件路径，已存在时直接复用
+    :param seed_path: 种子数据JSON，格式 {表名: [行数据]}，表名不区分大小写
+    :return: 数据库连接地址
+    """
+    db_url = f"sqlite:///{os.path.abspath(db_path)}"
+    if os.path.exists(db_path):
+        return db_url
+    seed = {}
+    if seed_path and os.path.exists(seed_path):
+        with open(seed_path, encoding="utf-8") as f:
+            seed = {name.lower(): rows for name, rows in json.load(f).items()}
+    _load_models()
+    model_tables = {name.lower() for name in SQLModel.metadata.tables}
+    dao_tables = dao_table_columns()
+    unknown_tables = set(seed) - model_tables - set(dao_tables)
+    if unknown_tables:
+        raise ValueError(f"种子数据中的表不在表模型及DAO查询中：{sorted(unknown_tables)}")
+
+    engine = create_engine(db_url)
+    try:
+        SQLModel.metadata.create_all(engine)
+        with engine.begin() as conn:
+            for table_name, columns in dao_tables.items():
+                columns = set(columns)
+                for row in seed.get(table_name, []):
+                    columns.update(key.upper() for key in row)
+                if table_name in model_tables:
+                    # 表模型已建表，补充DAO查询使用的列
+                    existing = {column["name"].upper() for column in inspect(conn).get_columns(table_name)}
+                    for column in sorted(columns - existing):
+                        conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN "{column}"'))
+                else:
+                    column_sql = ", ".join(f'"{column}"' for column in sorted(columns))
+                    conn.execute(text(f"CREATE TABLE {table_name} ({column_sql})"))
+        metadata = MetaData()
+        metadata.reflect(engine)
+        tables = {name.lower(): table for name, table in metadata.tables.items()}
+        with engine.begin() as conn:
+            for table_name, rows in seed.items():
+                if rows:
+                    table = tables[table_name]
+                    column_names = {column.name.upper(): column.name for column in table.columns}
+                    unknown_columns = {key for row in rows for key in row if key.upper() not in column_names}
+                    if unknown_columns:
+                        raise ValueError(f"种子数据表 {table_name} 中的列不存在：{sorted(unknown_columns)}")
+                    conn.execute(table.insert(), [{column_names[key.upper()]: value for key, value in row.items()}
+                                                  for row in rows])
+    finally:
+        engine.dispose()
+    return db_url
@@ -24,6 +24,8 @@ from data.db_access.yjt_data_access.dao.tq_bd_creditrtissue_dao import TqBdCredi
 from utils.file_util import mkdir
 from utils.addr_util import get_region_pca, get_min_region
 from utils.log_utils import get_logger
+from utils.concurrent_util import concurrent_map
+from config.config import CONCURRENCY_CONFIG
 
 logger = get_logger()
 
@@ -237,6 +239,87 @@ class DataDownload:
             logger.exception(e)
             raise Exception(f"数据库数据读取错误: {str(e)}")
 
+    def _download_local_eco(self, comName, comCode, actual_controller, cboardmap, region_dict):
+        """发行平台区域经济--地方"""
+        if region_dict["省"]:
+            # 省
+            province = region_dict["省"]
+            tqcibdRegifinNewDao = TqcibdRegifinNewDao()
+            national_local_eco = tqcibdRegifinNewDao.select_local_eco(province)
+            if national_local_eco is not None:
+                _year_month = self.get_year_month(national_local_eco, "endDate")
+                self.to_csv(comName, "地方区域经济",self.convert_to_comment_value_dicts(national_local_eco), _year_month)
+
+    def _download_region_companys(self, comName, comCode, actual_controller, cboardmap, region_dict):
+        """发行平台区域城投平台,先查城投数据，没有则按照实际控制推测，最后按照公司名推测"""
+        tqcibdRegifinaplatDao = TqcibdRegifinaplatDao()
+        region = tqcibdRegifinaplatDao.select_region(comName)
+        if region:
+            if "海门市" == region:
+                region = "海门区"
+            tqcibdRegifinaplatDao = TqcibdRegifinaplatDao()
+            region_companys = tqcibdRegifinaplatDao.select_region_companys(region)
+            if region_companys is not None:
+                _year_month = self.get_year_month(region_companys, "reportdate")
+                self.to_csv(comName, "区域发行平台",self.convert_to_comment_value_dicts(region_companys), _year_month)
+
+        elif cboardmap and actual_controller:
+            rel_region = self.get_rel_region(cboardmap, actual_controller)
+            rel_region = json.loads(rel_region)
+            region = rel_region.get("KEYNAME", "")
+            if "海门市" == region:
+                region = "海门区"
+            tqcibdRegifinaplatDao = TqcibdRegifinaplatDao()
+            region_companys = tqcibdRegifinaplatDao.select_region_companys(region)
+            if region_companys is not None:
+                _year_month = self.get_year_month(region_companys, "reportdate")
+                self.to_csv(comName, "区域发行平台",self.convert_to_comment_value_dicts(region_companys),
+                            _year_month)
+
+        else:
+            rel_region = self.get_rel_region_by_com(cboardmap, comName)
+            rel_region = json.loads(rel_region)
+            region = rel_region.get("KEYNAME", "")
+            if "海门市" == region:
+                region = "海门区"
+            tqcibdRegifinaplatDao = TqcibdRegifinaplatDao()
+            region_companys = tqcibdRegifinaplatDao.select_region_companys(region)
+            if region_companys is not None:
+                _year_month = self.get_year_month(region_companys, "reportdate")
+                self.to_csv(comName, "区域发行平台",self.convert_to_comment_value_dicts(region_companys),
+                            _year_month)
+
+    def _download_credit_rate(self, comName, comCode, actual_controller, cboardmap, region_dict):
+        """主体评级"""
+        tqBdCreditrtissueDao = TqBdCreditrtissueDao()
+        credit_rate = tqBdCreditrtissueDao.select_credit_rate(comCode)
+        credit_rate = {"主体评级": credit_rate}
+        credit_rate.update({"公司名称": comName})
+        credit_rate.update({"实际控制人": actual_controller})
+        credit_rate.update(region_dict)
+        if credit_rate:
+            self.to_csv(comName, "发行主体评级", [credit_rate])
+
+    def _download_national_eco(self, comName, comCode, actual_controller, cboardmap, region_dict):
+        """发行平台区域经济--全国"""
+        tqcibdRegifinNewDao = TqcibdRegifinNewDao()
+        national_province_eco = tqcibdRegifinNewDao.select_national_eco()
+        if national_province_eco is not None:
+            _year_month = self.get_year_month(national_province_eco, "endDate")
+            self.to_csv(comName, "全国区域经济", self.convert_to_comment_value_dicts(national_province_eco),
+                        _year_month)
+
+    def _download_dataset(self, comName, comCode, actual_controller, cboardmap, region_dict,
+                          file_name, query, date_attr, convert):
+        """按公司编码查询数据集并写出CSV"""
+        records = query(comCode)
+        if records is not None and len(records) > 0:
+            if date_attr:
+                _year_month = self.get_year_month(records, date_attr)
+            else:
+                _year_month = datetime.today().strftime("%Y%m")
+            self.to_csv(comName, file_name, convert(records), _year_month)
+
     def extract_data(self, comName):
         try:
             # 获取公司编码
@@ -263,142 +346,29 @@ class DataDownload:
                     elif item.get("BOARDCODE", "") == "1103":
                         region_dict["区"] = item["KEYNAME"]
 
-            # 发行平台区域经济--地方
-            if region_dict["省"]:
-                # 省
-                province = region_dict["省"]
-                tqcibdRegifinNewDao = TqcibdRegifinNewDao()
-                national_local_eco = tqcibdRegifinNewDao.select_local_eco(province)
-                if national_local_eco is not None:
-                    _year_month = self.get_year_month(national_local_eco, "endDate")
-                    self.to_csv(comName, "地方区域经济",self.convert_to_comment_value_dicts(national_local_eco), _year_month)
-
-            # 发行平台区域城投平台,先查城投数据，没有则按照实际控制推测，最后按照公司名推测
-            tqcibdRegifinaplatDao = TqcibdRegifinaplatDao()
-            region = tqcibdRegifinaplatDao.select_region(comName)
-            if region:
-                if "海门市" == region:
-                    region = "海门区"
-                tqcibdRegifinaplatDao = TqcibdRegifinaplatDao()
-                region_companys = tqcibdRegifinaplatDao.select_region_companys(region)
-                if region_companys is not None:
-                    _year_month = self.get_year_month(region_companys, "reportdate")
-                    self.to_csv(comName, "区域发行平台",self.convert_to_comment_value_dicts(region_companys), _year_month)
-
-            elif cboardmap and actual_controller:
-                rel_region = self.get_rel_region(cboardmap, actual_controller)
-                rel_region = json.loads(rel_region)
-                region = rel_region.get("KEYNAME", "")
-                if "海门市" == region:
-                    region = "海门区"
-                tqcibdRegifinaplatDao = TqcibdRegifinaplatDao()
-                region_companys = tqcibdRegifinaplatDao.select_region_companys(region)
-                if region_companys is not None:
-                    _year_month = self.get_year_month(region_companys, "reportdate")
-                    self.to_csv(comName, "区域发行平台",self.convert_to_comment_value_dicts(region_companys),
-                                _year_month)
-
-            else:
-                rel_region = self.get_rel_region_by_com(cboardmap, comName)
-                rel_region = json.loads(rel_region)
-                region = rel_region.get("KEYNAME", "")
-                if "海门市" == region:
-                    region = "海门区"
-                tqcibdRegifinaplatDao = TqcibdRegifinaplatDao()
-                region_companys = tqcibdRegifinaplatDao.select_region_companys(region)
-                if region_companys is not None:
-                    _year_month = self.get_year_month(region_companys, "reportdate")
-                    self.to_csv(comName, "区域发行平台",self.convert_to_comment_value_dicts(region_companys),
-                                _year_month)
-
-            # 主体评级
-            tqBdCreditrtissueDao = TqBdCreditrtissueDao()
-            credit_rate = tqBdCreditrtissueDao.select_credit_rate(comCode)
-            credit_rate = {"主体评级": credit_rate}
-            credit_rate.update({"公司名称": comName})
-            credit_rate.update({"实际控制人": actual_controller})
-            credit_rate.update(region_dict)
-            if credit_rate:
-                self.to_csv(comName, "发行主体评级", [credit_rate])
-
-            # 发行平台区域经济--全国
-            tqcibdRegifinNewDao = TqcibdRegifinNewDao()
-            national_province_eco = tqcibdRegifinNewDao.select_national_eco()
-            if national_province_eco is not None:
-                _year_month = self.get_year_month(national_province_eco, "endDate")
-                self.to_csv(comName, "全国区域经济", self.convert_to_comment_value_dicts(national_province_eco),
-                            _year_month)
-
-            # 股权结构
-            tqskShareholderDao = TqskShareholderDao()
-            share_holders = tqskShareholderDao.select_share_holder(comCode)
-            if share_holders is not None and len(share_holders) > 0:
-                _year_month = self.get_year_month(share_holders, "enddate")
-                self.to_csv(comName, "股权结构", self.convert_to_comment_value_dicts(share_holders),
-                            _year_month)
-
-            # 有息债务
-            tqfinInbeardebtDao = TqfinInbeardebtDao()
-            inbeardebts = tqfinInbeardebtDao.select_inbeardebt(comCode)
-            if inbeardebts is not None and len(inbeardebts) > 0:
-                _year_month = self.get_year_month(inbeardebts, "reportdate")
-                self.to_csv(comName, "有息负债", self.transpose_comment_value_dicts(inbeardebts), _year_month)
-
-            # 应收账款
-            tqfinFntop5acrecDao = TqfinFntop5acrecDao()
-            ac_recs = tqfinFntop5acrecDao.select_ac_rec(comCode)
-            if ac_recs is not None and len(ac_recs) > 0:
-                _year_month = self.get_year_month(ac_recs, "enddate")
-                self.to_csv(comName, "应收账款", self.convert_to_comment_value_dicts(ac_recs), _year_month)
-
-            # 其他应收
-            tqfinOtherreceDao = TqfinOtherreceDao()
-            other_recs = tqfinOtherreceDao.select_other_rece(comCode)
-            if other_recs is not None and len(other_recs) > 0:
-                _year_month = self.get_year_month(other_recs, "enddate")
-                self.to_csv(comName, "其他应收款", self.convert_to_comment_value_dicts(other_recs), _year_month)
-
-            # 存续债券
-            tqbdBasicinfoDao = TqbdBasicinfoDao()
-            old_bond = tqbdBasicinfoDao.select_outstanding_bonds(comCode)
-            if old_bond is not None and len(old_bond) > 0:
-                _year_month = datetime.today().strftime("%Y%m")
-                self.to_csv(comName, "存量债券", self.convert_to_comment_value_dicts(old_bond), _year_month)
-
-            # 非标融资
-            tqnsRegifinleaseDao = TqnsRegifinleaseDao()
-            fin_leases = tqnsRegifinleaseDao.select_fin_lease(comCode)
-            if fin_leases is not None and len(fin_leases) > 0:
-                _year_month = self.get_year_month(fin_leases, "reportdate")
-                self.to_csv(comName, "非标融资", self.convert_to_comment_value_dicts(fin_leases), _year_month)
-
-            # DCM注册额度
-            tqbdIssueregisterDao = TqbdIssueregisterDao()
-            dcm_bonds = tqbdIssueregisterDao.select_dcm_bond(comCode)
-            if dcm_bonds is not None and len(dcm_bonds) > 0:
-                _year_month = datetime.today().strftime("%Y%m")
-                self.to_csv(comName, "DCM注册额度", self.convert_to_comment_value_dicts(dcm_bonds), _year_month)
-
-            # 授信额度
-            tqbdCreditlinedetailsDao = TqbdCreditlinedetailsDao()
-            credit_lines = tqbdCreditlinedetailsDao.select_credit_line(comCode)
-            if credit_lines is not None and len(credit_lines) > 0:
-                _year_month = self.get_year_month(credit_lines, "enddate")
-                self.to_csv(comName, "授信情况", self.convert_to_comment_value_dicts(credit_lines), _year_month)
-
-            # 资产负债
-            tqfinPrgbalsheetnewDao = TqfinPrgbalsheetnewDao()
-            prgbal_sheets = tqfinPrgbalsheetnewDao.select_sheet(comCode)
-            if prgbal_sheets is not None and len(prgbal_sheets) > 0:
-                _year_month = self.get_year_month(prgbal_sheets, "enddate")
-                self.to_csv(comName, "资产负债", self.transpose_comment_value_dicts(prgbal_sheets), _year_month)
-
-            # 现金流
-            tqfinPrgcfstatementnewDao = TqfinPrgcfstatementnewDao()
-            cash_flows = tqfinPrgcfstatementnewDao.select_cash_flow(comCode)
-            if cash_flows is not None and len(cash_flows) > 0:
-                _year_month = self.get_year_month(cash_flows, "enddate")
-                self.to_csv(comName, "现金流", self.transpose_comment_value_dicts(cash_flows), _year_month)
+            # 以下数据集互不依赖，并发查询并各自写出CSV
+            download_tasks = [self._download_local_eco, self._download_region_companys, self._download_credit_rate,
+                              self._download_national_eco]
+            # 按公司编码查询的数据集：(文件名, 查询函数, 日期字段（为空取当月）, 转换方式)
+            datasets = [
+                ("股权结构", TqskShareholderDao().select_share_holder, "enddate",
+                 self.convert_to_comment_value_dicts),
+                ("有息负债", TqfinInbeardebtDao().select_inbeardebt, "reportdate", self.transpose_comment_value_dicts),
+                ("应收账款", TqfinFntop5acrecDao().select_ac_rec, "enddate", self.convert_to_comment_value_dicts),
+                ("其他应收款", TqfinOtherreceDao().select_other_rece, "enddate", self.convert_to_comment_value_dicts),
+                ("存量债券", TqbdBasicinfoDao().select_outstanding_bonds, None, self.convert_to_comment_value_dicts),
+                ("非标融资", TqnsRegifinleaseDao().select_fin_lease, "reportdate", self.convert_to_comment_value_dicts),
+                ("DCM注册额度", TqbdIssueregisterDao().select_dcm_bond, None, self.convert_to_comment_value_dicts),
+                ("授信情况", TqbdCreditlinedetailsDao().select_credit_line, "enddate",
+                 self.convert_to_comment_value_dicts),
+                ("资产负债", TqfinPrgbalsheetnewDao().select_sheet, "enddate", self.transpose_comment_value_dicts),
+                ("现金流", TqfinPrgcfstatementnewDao().select_cash_flow, "enddate", self.transpose_comment_value_dicts),
+            ]
+            for dataset in datasets:
+                download_tasks.append(lambda *args, _dataset=dataset: self._download_dataset(*args, *_dataset))
+            mkdir(f'{self.output_dir}/external_data')
+            concurrent_map(lambda task: task(comName, comCode, actual_controller, cboardmap, region_dict),
+                           download_tasks, max_workers=CONCURRENCY_CONFIG.get("db_max_workers", 1))
 
         except Exception as e:
             logger.exception(e)
@@ -5,80 +5,104 @@ import time
 import re
 
 from utils.log_utils import get_logger
+from utils.concurrent_util import concurrent_map
 
 logger = get_logger()
 
 
 class TableProcessor:
-    def __init__(self, table_contexts, llm):
+    def __init__(self, table_contexts, llm, max_workers=None):
         """
         [{"id":"","menu":"","pretext":"","content":"","darray":[[]],"oxml":object}]
+        max_workers: 大模型调用最大并发数，默认取配置
         """
         self.table_contexts = table_contexts
         self.llm = llm
+        self.max_workers = max_workers
 
     # 生成表格特征
     def gen_table_feature(self, table_type_list: list):
         start_time = time.time()
-        table_feature_datas = []
-        for table_context in self.table_contexts:
-            base_feature_messages = [{
-                "role": "user",
-                "content": f"""/no_think
-                你是财务表格分析专家，根据表格所属章节、表格上下文和表格内容，提取表格特征，并以JSON格式输出：
-                【表格特征】
-                表格类型，所属章节，表格标题，表头，关键词，时间序列
-                【表格特征提取说明】
-                表格类型：
-                - 仅限以下类型范围：{table_type_list}
-                - 若表格类型不在类型范围内，强制输出**其他表**，不得保留原类型名称
-                关键词
-                - 关键词要包含期限信息（如果有）
-                【表格所属章节】
-                {table_context.get("menu")}
-                【表格上下文】
-                {table_context.get("pretext")}
-                【表格内容】
-                {table_context.get("content")}
-                【输出格式】
-                {{
-                    "表格类型":"",
-                    "所属章节":"",
-                    "表格标题":"",
-                    "表头":[],
-                    "关键词":[],
-                    "时间序列":[],
-                }}
-                【特别说明】
-                输出结果严格按照JSON格式输出，且表格特征相关字段必须都要输出，已经尝试{{itr_cnt}}次，不能再出错了。
-                """
-            }]
-            tmp_table_type = None
-            feature_obj = {}
-            cnt = 0
-            while tmp_table_type is None and cnt < 3:
-                cnt += 1
-                feature_messages = copy.deepcopy(base_feature_messages)
-                feature_messages[0]['content'] = self.safe_format(feature_messages[0]['content'], itr_cnt=cnt)
-                # print("表格上下文数据：",table_context)
-                try:
-                    result = self.llm.generate(feature_messages)
-                    feature_obj = json.loads(result)
-                    # if feature_obj.get("表格类型",None) in (table_type_list+['其他表']):
-                    if feature_obj.get("表格类型", None) is not None and feature_obj.get("表格类型", None) != "":
-                        tmp_table_type = feature_obj.get("表格类型")
-                except:
-                    logger.error(f"特征提取失败：{table_context.get('pretext')}")
+        table_feature_datas = concurrent_map(lambda table_context: self._gen_table_feature(table_context, table_type_list),
+                                             self.table_contexts, self.max_workers)
+        logger.info(f"表格特征提取完成，表格数：{len(table_feature_datas)}，耗时：{time.time() - start_time:.2f}s")
+        return table_feature_datas
 
-                if cnt > 1:
-                    logger.debug(f"表格特征提取轮次{cnt}")
-                    logger.debug("菜单：", table_context.get("menu"))
-                    logger.debug("表格上下文：", table_context.get("pretext"))
-                    logger.debug(f"表格特征：{result}")
-                    logger.debug(f"表格数据：{table_context.get('content')}")
+    @staticmethod
+    def _is_valid_feature(result):
+        """表格特征结果校验：JSON且表格类型非空，不通过的结果不写入大模型缓存"""
+        try:
+            return bool(json.loads(result).get("表格类型"))
+        except Exception:
+            return False
 
-            table_feature_datas.append({"id": table_context.get("id"), **feature_obj})
-        return table_feature_datas
+    @staticmethod
+    def _is_valid_target_id(result):
+        """目标表ID结果校验：JSON且id符合格式，不通过的结果不写入大模型缓存"""
+        try:
+            return bool(re.match(r'^[a-z0-9\-]{4,}$', json.loads(result).get("id", "0")))
+        except Exception:
+            return False
+
+    # 生成单个表格特征
+    def _gen_table_feature(self, table_context, table_type_list: list):
+        base_feature_messages = [{
+            "role": "user",
+            "content": f"""/no_think
+            你是财务表格分析专家，根据表格所属章节、表格上下文和表格内容，提取表格特征，并以JSON格式输出：
+            【表格特征】
+            表格类型，所属章节，表格标题，表头，关键词，时间序列
+            【表格特征提取说明】
+            表格类型：
+            - 仅限以下类型范围：{table_type_list}
+            - 若表格类型不在类型范围内，强制输出**其他表**，不得保留原类型名称
+            关键词
+            - 关键词要包含期限信息（如果有）
+            【表格所属章节】
+            {table_context.get("menu")}
+            【表格上下文】
+            {table_context.get("pretext")}
+            【表格内容】
+            {table_context.get("content")}
+            【输出格式】
+            {{
+                "表格类型":"",
+                "所属章节":"",
+                "表格标题":"",
+                "表头":[],
+                "关键词":[],
+                "时间序列":[],
+            }}
+            【特别说明】
+            输出结果严格按照JSON格式输出，且表格特征相关字段必须都要输出，已经尝试{{itr_cnt}}次，不能再出错了。
+            """
+        }]
+        tmp_table_type = None
+        feature_obj = {}
+        result = None
+        cnt = 0
+        while tmp_table_type is None and cnt < 3:
+            cnt += 1
+            feature_messages = copy.deepcopy(base_feature_messages)
+            feature_messages[0]['content'] = self.safe_format(feature_messages[0]['content'], itr_cnt=cnt)
+            # print("表格上下文数据：",table_context)
+            try:
+                result = self.llm.generate(feature_messages, validate=self._is_valid_feature)
+                feature_obj = json.loads(result)
+                # if feature_obj.get("表格类型",None) in (table_type_list+['其他表']):
+                if feature_obj.get("表格类型", None) is not None and feature_obj.get("表格类型", None) != "":
+                    tmp_table_type = feature_obj.get("表格类型")
+            except:
+                logger.error(f"特征提取失败：{table_context.get('pretext')}")
+
+            if cnt > 1:
+                logger.debug(f"表格特征提取轮次{cnt}")
+                logger.debug("菜单：", table_context.get("menu"))
+                logger.debug("表格上下文：", table_context.get("pretext"))
+                logger.debug(f"表格特征：{result}")
+                logger.debug(f"表格数据：{table_context.get('content')}")
+
+        return {"id": table_context.get("id"), **feature_obj}
 
     def _get_tables_by_ids(self, table_ids):
         target_table_datas = []
@@ -122,7 +146,7 @@ class TableProcessor:
                 print("候选表特征：")
                 for candidate_table_feature in candidate_table_features:
                     print(candidate_table_feature)
-            target_result = self.llm.generate(target_messages)
+            target_result = self.llm.generate(target_messages, validate=self._is_valid_target_id)
             try:
                 target_id = json.loads(target_result).get("id", "0")
                 if not re.match(r'^[a-z0-9\-]{4,}$', target_id):
@@ -133,8 +157,8 @@ class TableProcessor:
 
     def extract_target_tables(self, target_table_descs, table_feature_datas):
         extract_start_time = time.time()
-        # 目标表ID
-        target_table_ids = []
+        # 筛选每类目标表的候选表格
+        target_tasks = []
         for tab_name, tab_desc in target_table_descs.items():
             candidate_table_features = []
             for table_feature_data in table_feature_datas:
@@ -144,10 +168,16 @@ class TableProcessor:
                     candidate_table_features.append(table_feature_data)
             if len(candidate_table_features) == 0:
                 continue
-            # 调用大模型
-            table_id = self._extract_target_table_id(tab_desc, candidate_table_features)
+            target_tasks.append((tab_name, tab_desc, candidate_table_features))
+        # 并发调用大模型，结果按目标表顺序合并
+        table_ids = concurrent_map(lambda task: self._extract_target_table_id(task[1], task[2]),
+                                   target_tasks, self.max_workers)
+        # 目标表ID
+        target_table_ids = []
+        for (tab_name, _, _), table_id in zip(target_tasks, table_ids):
             if table_id:
                 target_table_ids.append({"name": tab_name, "id": table_id})
+        logger.info(f"目标表格识别完成，耗时：{time.time() - extract_start_time:.2f}s")
         if len(target_table_ids) == 0:
             return []
         target_table_datas = self._get_tables_by_ids(target_table_ids)
@@ -0,0 +1,97 @@
+import os
+import zipfile
+
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn, nsmap
+from docx.oxml.parser import element_class_lookup
+from lxml import etree
+
+from config.config import DOC_PARSE_CONFIG
+
+
+class LoadedDoc:
+    """
+    已加载的word文档，文档包只打开一次，
+    直接提供正文、样式、编号元素树，避免重复打开文档及序列化后再解析；
+    流式模式下不加载完整文档，正文通过iterparse逐个读取并释放
+    """
+
+    def __init__(self, doc_path, streaming=None):
+        self.doc_path = doc_path
+        self.streaming = DOC_PARSE_CONFIG.get("streaming", False) if streaming is None else streaming
+        self._document = None
+        if not self.streaming:
+            self._document = Document(doc_path)
+
+    def is_same_path(self, doc_path):
+        return doc_path is not None and os.path.abspath(doc_path) == os.path.abspath(self.doc_path)
+
+    @property
+    def document(self):
+        """python-docx文档对象，流式模式下首次访问时加载"""
+        if self._document is None:
+            self._document = Document(self.doc_path)
+        return self._document
+
+    @property
+    def element(self):
+        """文档根元素 w:document"""
+        return self.document.element
+
+    @property
+    def body(self):
+        """正文元素 w:body"""
+        return self.document.element.body
+
+    @property
+    def nsmap(self):
+        if self._document is None:
+            return nsmap
+        return self.document.element.nsmap
+
+    @property
+    def styles_element(self):
+        """样式元素 w:styles"""
+        if self._document is None:
+            return self._read_part_element("word/styles.xml")
+        return self.document.styles.element
+
+    @property
+    def numbering_element(self):
+        """编号元素 w:numbering，文档无编号时返回None"""
+        if self._document is None:
+            return self._read_part_element("word/numbering.xml")
+        try:
+            return self.document.part.numbering_part.element
+        except (KeyError, NotImplementedError):
+            return None
+
+    def _read_part_element(self, part_name):
+        with zipfile.ZipFile(self.doc_path) as docx_zip:
+            if part_name not in docx_zip.namelist():
+                return None
+            return parse_xml(docx_zip.read(part_name))
+
+    def iter_body_elements(self):
+        """
+        遍历正文下的一级元素；
+        流式模式下只产出w:p和w:tbl，元素处理完后即被清除，调用方需在迭代中取出所需数据
+        """
+        if not self.streaming or self._document is not None:
+            yield from self.body.iterchildren()
+            return
+        body_tag = qn("w:body")
+        with zipfile.ZipFile(self.doc_path) as docx_zip, docx_zip.open("word/document.xml") as xml_file:
+            context = etree.iterparse(xml_file, events=("end",), tag=(qn("w:p"), qn("w:tbl")), huge_tree=True)
+            # 与python-docx一致的元素类，保证 .text/.val 等属性可用
+            context.set_element_class_lookup(element_class_lookup)
+            for _, elem in context:
+                parent = elem.getparent()
+                if parent is None or parent.tag != body_tag:
+                    continue
+                yield elem
+                # 释放已处理元素
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
@@ -1,8 +1,7 @@
-from docx import Document
 from utils.file_util import *
-from docx.oxml import parse_xml
 from docx.oxml.ns import qn
 from utils.log_utils import get_logger
+from data.doc_data.loaded_doc import LoadedDoc
 
 logger = get_logger()
 
@@ -10,6 +9,8 @@ logger = get_logger()
 class OrganizeDoc():
     def __init__(self, src_dir):
         self.src_dir = src_dir
+        # 已加载的募集说明书，供后续解析复用
+        self.prospectus_doc = None
 
     def instr(self, string, list):
         if any(x in string for x in list):
@@ -39,14 +40,13 @@ class OrganizeDoc():
             curr_table.append(row_data)
         return curr_table
 
-    def get_company_name(self, file_path):
+    def get_company_name(self, file_path, loaded_doc=None):
         logger.info(file_path)
         _company_name = None
-        _doc = Document(file_path)
-        _doc_elem = parse_xml(_doc.part.element.xml)
-        _body_elem = _doc_elem.find("w:body", _doc_elem.nsmap)
+        _loaded_doc = loaded_doc if loaded_doc is not None else LoadedDoc(file_path)
+        _nsmap = _loaded_doc.nsmap
         com_keyword = r"(.*有限公司)|(.*投资公司)|(.*有限责任公司)|(.*投资经营公司)|(.*总公司)"
-        for para_elem in _body_elem.getchildren():
+        for para_elem in _loaded_doc.iter_body_elements():
             if _company_name:
                 break
             if para_elem.tag == qn("w:p"):
@@ -58,7 +58,7 @@ class OrganizeDoc():
                 if "募集说明书" in para_elem.text:
                     break
             elif para_elem.tag == qn("w:tbl"):
-                _row_list = self.parse_oxml_to_2list(para_elem, _doc_elem.nsmap)
+                _row_list = self.parse_oxml_to_2list(para_elem, _nsmap)
                 for _row in _row_list:
                     if _company_name:
                         break
@@ -72,13 +72,17 @@ class OrganizeDoc():
 
         return _company_name
 
-    def which_company_name(self, file_path, company_names):
-        _doc = Document(file_path)
-        for _para in _doc.paragraphs:
-            if len(_para.text) < 25:
+    def which_company_name(self, file_path, company_names, loaded_doc=None):
+        # 逐个遍历正文段落，流式模式下不加载完整文档
+        _loaded_doc = loaded_doc if loaded_doc is not None else LoadedDoc(file_path)
+        for para_elem in _loaded_doc.iter_body_elements():
+            if para_elem.tag != qn("w:p"):
+                continue
+            _text = para_elem.text or ""
+            if len(_text) < 25:
                 continue
             for company_name in company_names:
-                if company_name in _para.text:
+                if company_name in _text:
                     return company_name
 
     def organize(self):
@@ -97,7 +101,8 @@ class OrganizeDoc():
                             _file = _file + "x"
                             _src_dir = _src_dir + "x"
                         if "募集说明书" in file:
-                            company_name = self.get_company_name(_src_dir)
+                            self.prospectus_doc = LoadedDoc(_src_dir)
+                            company_name = self.get_company_name(_src_dir, self.prospectus_doc)
                             logger.info(f"公司名称：{company_name}")
                             # 募集转为pdf
                             # convert_doc_to_pdf(_src_dir, os.path.join(self.src_dir, f"{os.path.splitext(file)[0]}.pdf"))
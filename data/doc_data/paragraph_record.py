@@ -0,0 +1,34 @@
+import sys
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+def _intern(value):
+    return sys.intern(value) if value is not None else None
+
+
+@dataclass(slots=True)
+class ParagraphRecord:
+    """
+    文档段落/表格记录
+    type: text|table，content: 段落文本或表格二维数组，level: 大纲级别
+    样式字段为段落样式，重复值较多，构建时做字符串驻留
+    """
+    type: str
+    content: Any
+    oxml: Any = None
+    level: Optional[int] = None
+    style_id: Optional[str] = None
+    outline_lvl: Optional[int] = None
+    num_id: Optional[str] = None
+    ilvl: Optional[str] = None
+    align: Optional[str] = None
+
+    @classmethod
+    def text(cls, content, oxml=None, style_id=None, outline_lvl=None, num_id=None, ilvl=None, align=None):
+        return cls("text", content, oxml, None, _intern(style_id), outline_lvl, _intern(num_id), _intern(ilvl),
+                   _intern(align))
+
+    @classmethod
+    def table(cls, content, oxml=None):
+        return cls("table", content, oxml)
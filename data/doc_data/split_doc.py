@@ -1,23 +1,42 @@
 import difflib
-import asyncio
 import os, re
 import time
 import pandas as pd
 import json
-import zipfile
+import copy
 import uuid
 from typing import Dict
 
-from docx import Document
 from docx.oxml import parse_xml
 from docx.oxml.ns import qn
+from lxml import etree
 from utils.string_util import extract_date, extract_unit
 from utils.log_utils import get_logger
+from utils.concurrent_util import concurrent_map
+from utils.prompt_packer import pack_prompt, count_tokens
+from config.config import TITLE_DETECT_CONFIG
 from analyze.private_apply import PrivateApply
 from data.doc_data.doc_table_processor import TableProcessor
+from data.doc_data.loaded_doc import LoadedDoc
+from data.doc_data.paragraph_record import ParagraphRecord
 
 logger = get_logger()
-semaphore = asyncio.Semaphore(10)
+
+# 标题识别规则（预编译）
+NOT_TITLE_START_PATTERN = re.compile(r"^[①②③④⑤⑥a-zA-Z](\s)?[\\.、）)]?.*")
+NOT_TITLE_END_PATTERN = re.compile(r'[\?\!\.\;\、\？\！\。\；\/]+$')
+PUNCTUATION_END_PATTERN = re.compile(r'[\:\,\?\!\.\;\：\，\、\？\！\。\；\/]+$')
+FIELD_COLON_PATTERN = re.compile(r"(名称|法定代表人|所属行业|实缴资本|设立日期|统一社会信用代码|数据来源|住所|办公地址|传真|邮政编码|联系|电话|负责人|联系人|包括|上述|如下|以下|下列|介绍|其中|借|贷|注|单位)+.*?[\\:：]+")
+SPECIAL_CHAR_PATTERN = re.compile(r'[【】—]')
+TITLE_SPECIAL_CHAR_PATTERN = re.compile(r'(【|】|签字(）)*：|,|，)+')
+PAGE_NUM_PATTERN = re.compile(r'^[0-9]+$')
+PAGE_HEADER_PATTERN = re.compile(r'.{6,}募集说明书$')
+TRAILING_NUM_PATTERN = re.compile(r'[0-9]+$')
+ISSUE_AGENCY_PATTERN = re.compile(r"发行.*?有关机构")
+NOT_TITLE_PREFIXES = ("单位：", "表", "图", "目录", "注：", "年月日", "_")
+FIRST_LEVEL_HZ_LEVELS = (0, 1)
+OTHER_LEVEL_HZ_LEVELS = (2, 3, 4, 5, 6, 7)
+
 
 class SplitDoc():
     """
@@ -27,9 +46,12 @@ class SplitDoc():
     不过，通过上面确认的标题范围，存在很多脏数据，需要再次通过word中的标题做进一步的清洗；
     """
 
-    def __init__(self, doc_path, company_name):
+    def __init__(self, doc_path, company_name, loaded_doc=None):
         self.doc_path = doc_path
-        self.doc = Document(doc_path)
+        # 复用已加载的文档，避免重复打开
+        if loaded_doc is None or not loaded_doc.is_same_path(doc_path):
+            loaded_doc = LoadedDoc(doc_path)
+        self.loaded_doc = loaded_doc
         self.private_apply_instance = PrivateApply()
         self.table_data_set = [company_name]
         # 类似标题前缀
@@ -39,13 +61,15 @@ class SplitDoc():
         oth_level_seqs_list = []
         self._init_hz_seq()
         self.paragraphs = self.parse_doc()
+        # 标题列表缓存
+        self._doc_titles = None
         self.table_datas = {}
         self.table_oxmls = {}
         self.article_datas = {}
         self.company_info = {}
         self.fuzhai_total = []
 
-        self.menus = [title.get("content") for title in self.parse_doc_title()]
+        self.menus = [title.get("content") for title in self.get_doc_titles()]
         self.table_keywords_exclude = ["发行人受限货币资金", "营业成本具体构成情况如下", "经营性(其他应收|分类统计)", "政府补助的应收款项"]  # 有息负债分类情况
 
         self.table_keywords = [
@@ -100,10 +124,23 @@ class SplitDoc():
 
         self.hz_seq_2dlist = [hz0_seq, hz1_seq, hz2_seq, hz3_seq, hz4_seq, hz5_seq, hz6_seq, hz7_seq]
         self.hz_seq_list = hz0_seq + hz1_seq + hz2_seq + hz3_seq + hz4_seq + hz5_seq + hz6_seq + hz7_seq + hz8_seq
-        self.level_seqs = [hz0_seq + hz1_seq]
+        self.level_seqs = [tuple(hz0_seq + hz1_seq)]
         self.first_level_hz_seq = hz0_seq + hz1_seq
-        self.oth_level_seqs_list = [hz2_seq, hz3_seq, hz4_seq, hz5_seq, hz6_seq, hz7_seq]
+        self.oth_level_seqs_list = [tuple(hz2_seq), tuple(hz3_seq), tuple(hz4_seq), tuple(hz5_seq), tuple(hz6_seq), tuple(hz7_seq)]
         self.other_level_hz_seq = hz2_seq + hz3_seq + hz4_seq + hz5_seq + hz6_seq + hz7_seq
+        # 标题前缀 -> 层级（hz_seq序号），各层级前缀互不为前缀，匹配结果唯一
+        self.hz_seq_level = {}
+        for level, hz_seq in enumerate([hz0_seq, hz1_seq, hz2_seq, hz3_seq, hz4_seq, hz5_seq, hz6_seq, hz7_seq, hz8_seq]):
+            for seq in hz_seq:
+                self.hz_seq_level.setdefault(seq, level)
+        # 所有标题前缀编译为一个正则，长前缀优先
+        self.hz_seq_pattern = re.compile(
+            "|".join(re.escape(seq) for seq in sorted(self.hz_seq_level, key=len, reverse=True)))
+
+    def match_hz_seq_level(self, text):
+        """匹配标题前缀，返回前缀所属层级，不匹配返回None"""
+        match = self.hz_seq_pattern.match(text)
+        return self.hz_seq_level.get(match.group(0)) if match else None
 
     def _is_first_level_title(self, text):
         """判断是否为一级标题"""
@@ -111,41 +148,39 @@ class SplitDoc():
             return False
         if len(text) > 50:
             return False
+        hz_level = self.match_hz_seq_level(text)
         # 判断是否为目录内容
-        if text.startswith(tuple(self.hz_seq_list)) and bool(re.search(r'[0-9]+$', text)):
+        if hz_level is not None and TRAILING_NUM_PATTERN.search(text):
             return False
-        if text.startswith(tuple(self.first_level_hz_seq)):
+        if hz_level in FIRST_LEVEL_HZ_LEVELS:
             return True
-        if text.startswith(tuple(self.other_level_hz_seq)):
+        if hz_level in OTHER_LEVEL_HZ_LEVELS:
             return False
-        if any(text.startswith(_hz_seq) for _hz_seq in self.first_level_hz_seq):
-            return True
 
     def _is_title(self, paragraph, context):
         _is_potential_title = self._is_potential_title(paragraph)
         if _is_potential_title is None:
-            return self.is_title_by_llm(paragraph.get("content"), context)
+            return self.is_title_by_llm(paragraph.content, context)
         else:
             return _is_potential_title
 
     def _is_potential_title(self,paragraph):
         """强规则"""
-        text = paragraph.get("content")
-        style = paragraph.get("style")
-        align = style.get("align") if style is not None else None
+        text = paragraph.content
+        align = paragraph.align
         if len(text) > 50:
             return False
         # 特定字符开头不是标题
-        if bool(re.search(r"^[①②③④⑤⑥a-zA-Z](\s)?[\\.、）)]?.*", text)):
+        if NOT_TITLE_START_PATTERN.search(text):
             return False
         # 特定字符结尾不是标题
-        if bool(re.search(r'[\?\!\.\;\、\？\！\。\；\/]+$', text)):
+        if NOT_TITLE_END_PATTERN.search(text):
             return False
         # 含有冒号且含有特殊字符不是标题
-        if bool(re.search(r"(名称|法定代表人|所属行业|实缴资本|设立日期|统一社会信用代码|数据来源|住所|办公地址|传真|邮政编码|联系|电话|负责人|联系人|包括|上述|如下|以下|下列|介绍|其中|借|贷|注|单位)+.*?[\\:：]+", text)):
+        if FIELD_COLON_PATTERN.search(text):
             return False
         # 包含特殊字符都不是标题
-        if bool(re.search(r'[【】—]', text)):
+        if SPECIAL_CHAR_PATTERN.search(text):
             return False
         # 居右的文本不是标题
         if align is not None and align.lower() =='right':
@@ -154,12 +189,13 @@ class SplitDoc():
         if align is not None and align.lower() =='center' and (not self._is_first_level_title(text)):
             return False
         # 排除页眉页脚
-        if bool(re.search(r'^[0-9]+$', text)) or bool(re.search(r'.{6,}募集说明书$', text)):
+        if PAGE_NUM_PATTERN.search(text) or PAGE_HEADER_PATTERN.search(text):
             return False
+        hz_level = self.match_hz_seq_level(text)
         # 剔除目录内容：前部分是标题，结尾是页码
-        if text.startswith(tuple(self.hz_seq_list)) and bool(re.search(r'[0-9]+$', text)):
+        if hz_level is not None and TRAILING_NUM_PATTERN.search(text):
             return False
-        elif text.startswith(tuple(self.hz_seq_list)) and not bool(re.search(r'[\:\,\?\!\.\;\：\，\、\？\！\。\；\/]+$', text)):
+        elif hz_level is not None and not PUNCTUATION_END_PATTERN.search(text):
             return True
 
     def is_title(self, text: str, context: str = None):
@@ -172,21 +208,22 @@ class SplitDoc():
             return False
 
         # 除冒号外的标点符号结尾都不认为是标题
-        if bool(re.search(r'[\?\!\.\;\、\？\！\。\；\/]+$', text)):
+        if NOT_TITLE_END_PATTERN.search(text):
             return False
         # 包含特殊字符都不认为是标题
-        if bool(re.search(r'(【|】|签字(）)*：|,|，)+', text)) or bool(re.search(r'：', text[:-1])):
+        if TITLE_SPECIAL_CHAR_PATTERN.search(text) or '：' in text[:-1]:
             return False
         # 以特殊字符开头也不认为标题
-        if text.startswith(tuple(["单位：", "表", "图", "目录", "注：", "年月日", "_"])):
+        if text.startswith(NOT_TITLE_PREFIXES):
             return False
         # 排除页眉页脚
-        if bool(re.search(r'^[0-9]+$', text)) or bool(re.search(r'.{6,}募集说明书$', text)):
+        if PAGE_NUM_PATTERN.search(text) or PAGE_HEADER_PATTERN.search(text):
             return False
+        hz_level = self.match_hz_seq_level(text)
         # 判断是否为目录内容
-        if text.startswith(tuple(self.hz_seq_list)) and bool(re.search(r'[0-9]+$', text)):
+        if hz_level is not None and TRAILING_NUM_PATTERN.search(text):
             return False
-        elif text.startswith(tuple(self.hz_seq_list)) and not self.ends_with_punctuation(text):
+        elif hz_level is not None and not self.ends_with_punctuation(text):
             return True
         # 利用大模型判断是否为标题
         if context and self.is_title_by_llm(text, context):
@@ -199,7 +236,7 @@ class SplitDoc():
         start_time = time.time()
         logger.debug("开始抽取文档目录")
         # 获取标题列表
-        doc_title_list = self.parse_doc_title()
+        doc_title_list = self.get_doc_titles()
         # 设置标题层级
         menu_list = self.get_menu_list(doc_title_list)
         # 面包屑导航
@@ -229,14 +266,14 @@ class SplitDoc():
 
     def parse_doc(self):
         start_time = time.time()
-        doc = Document(self.doc_path)
-        doc_elem = parse_xml(doc.part.element.xml)
-        namespaces = doc_elem.nsmap
+        namespaces = self.loaded_doc.nsmap
         self.namespaces = namespaces
-        body_elem = doc_elem.find("w:body", namespaces)
+        # 段落不保留oxml（后续未使用）；流式模式下表格保留序列化后的xml，
+        # 非流式模式下表格保留元素副本，表格合并及写入报告时会移动元素，不能修改共享的LoadedDoc
+        streaming = self.loaded_doc.streaming
         # 文档段落
         paragraphs = []
-        for para_elem in body_elem.getchildren():
+        for para_elem in self.loaded_doc.iter_body_elements():
             if para_elem.tag == qn("w:p"):
                 # 过滤文本为空情况
                 if (para_elem.text is None or para_elem.text.strip().replace(" ", "") == '' or para_elem.text.strip().replace("	", "") == ''):
@@ -253,15 +290,19 @@ class SplitDoc():
                 ilvl = ilvl_el.get(qn('w:val')) if ilvl_el is not None else None
                 align_el = para_elem.find(".//w:pPr/w:jc", namespaces)
                 align = align_el.get(qn('w:val')) if align_el is not None else None
-                style = {"styleId": style_id, "outlineLvl": level, "numId": numId, "ilvl": ilvl, "align": align}
-                paragraphs.append({"type": "text", "content": text, "oxml": para_elem, "level": None, "style": style})
+                paragraphs.append(ParagraphRecord.text(text, None, style_id, level, numId, ilvl, align))
             elif para_elem.tag == qn("w:tbl"):
                 tab_datas = self.parse_oxml_to_2list(para_elem, namespaces)
-                style = {"styleId": None, "outlineLvl": None, "numId": None, "ilvl": None, "align": None}
-                paragraphs.append({"type": "table", "content": tab_datas, "oxml": para_elem, "level": None, "style": style})
+                paragraphs.append(ParagraphRecord.table(tab_datas, etree.tostring(para_elem) if streaming else copy.deepcopy(para_elem)))
         logger.debug(f"文档解析结束，总耗时： {time.time() - start_time}")
         return paragraphs
 
+    def _load_oxml(self, oxml):
+        """流式模式下表格oxml为序列化后的xml，使用时再解析为元素"""
+        if isinstance(oxml, bytes):
+            return parse_xml(oxml)
+        return oxml
+
     def is_title_by_llm(self, text: str, context: str = None):
         title_messages = [{
             "role": "user",
@@ -291,9 +332,86 @@ class SplitDoc():
         else:
             return False
 
+    def is_titles_by_llm(self, items):
+        """
+        批量判断是否为标题
+        :param items: [{"index": 段落索引, "text": 文本数据, "context": 段落上下文}]
+        :return: {段落索引: 是否为标题}
+        """
+        batches = self._pack_title_batches(items)
+        batch_results = concurrent_map(self._is_titles_by_llm, batches)
+        verdicts = {}
+        for batch_result in batch_results:
+            verdicts.update(batch_result)
+        # 批量结果中缺失的段落，逐条调用大模型
+        missing_items = [item for item in items if item["index"] not in verdicts]
+        if missing_items:
+            logger.debug(f"批量标题识别缺失{len(missing_items)}条，逐条识别")
+            missing_results = concurrent_map(lambda item: self.is_title_by_llm(item["text"], item["context"]), missing_items)
+            for item, result in zip(missing_items, missing_results):
+                verdicts[item["index"]] = result
+        return verdicts
+
+    def _pack_title_batches(self, items):
+        """按token预算将待识别段落打包"""
+        token_budget = TITLE_DETECT_CONFIG.get("batch_token_budget", 6000)
+        max_items = TITLE_DETECT_CONFIG.get("batch_max_items", 50)
+        batches = []
+        batch, batch_tokens = [], 0
+        for item in items:
+            item_tokens = count_tokens(item["text"]) + sum(count_tokens(ctx) for ctx in item["context"])
+            if batch and (batch_tokens + item_tokens > token_budget or len(batch) >= max_items):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(item)
+            batch_tokens += item_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _is_titles_by_llm(self, batch):
+        batch_datas = [{"index": item["index"], "段落上下文": item["context"], "文本数据": item["text"]} for item in batch]
+        title_messages = [{
+            "role": "user",
+            "content": f"""/no_think
+            你是金融文档分析专家，根据每条数据的**段落上下文**，逐条判断所提供的**文本数据**是否为标题，不做任何解释，只以JSON格式返回是或否。
+            【待判断数据】
+            {json.dumps(batch_datas, ensure_ascii=False)}
+            【注意事项】
+            1. **段落上下文**是列表格式，列表元素代表一个标题、段落、表名称或目录内容；
+            2. **文本数据**是**段落上下文**的一个元素；
+            3. 目录内容虽然符合标题的要求，但结尾会带页码(阿拉伯数字或罗马数字)，结果输出否；
+            4. **文本数据**前后连续出现带标题序号的单句，虽然符合标题要求,但单句之间没有内容文本，不符合标题-内容结构，结果输出否；
+            5. 表格标题后文中紧跟着表格单位，不属于标题，结果输出否；
+            6. 表名称中一般带“表：”，结果输出否；
+            7. **文本数据**为标题时，可能没有文字序号或数字序号；
+            8. 每条待判断数据都要输出结果，index与待判断数据保持一致；
+            【结果输出】
+            {{"结果": [{{"index": 0, "结果": "是"}}, {{"index": 1, "结果": "否"}}]}}
+            """
+        }]
+        verdicts = {}
+        batch_indexes = {item["index"] for item in batch}
+        try:
+            result = json.loads(self.private_apply_instance.generate(title_messages))
+            verdict_list = result.get("结果", [])
+        except Exception as e:
+            logger.error(f"批量标题识别异常：{e}")
+            return verdicts
+        # 逐条解析，单条格式异常只跳过该条，由调用方逐条补充识别
+        for verdict in verdict_list:
+            try:
+                idx = int(verdict.get("index"))
+            except (AttributeError, TypeError, ValueError):
+                logger.warning(f"批量标题识别结果格式异常：{verdict}")
+                continue
+            if idx in batch_indexes:
+                verdicts[idx] = "是" in str(verdict.get("结果", ""))
+        return verdicts
+
     def company_extractor(self, sections):
         # 抽取发行人和担保人公司名称
-        basic_infos = sections.get("募集信息")[:30000]
+        basic_infos = pack_prompt(sections.get("募集信息"))
         messages = [{
             "role": "user",
             "content": f"""/no_think
@@ -313,18 +431,18 @@ class SplitDoc():
 
     def ends_with_punctuation(self, text: str):
         """判断结尾标点符号"""
-        return bool(re.search(r'[\:\,\?\!\.\;\：\，\、\？\！\。\；\/]+$', text))
+        return bool(PUNCTUATION_END_PATTERN.search(text))
 
     def get_title_level(self, title):
         # 若存在之前层级中，则直接返回层级
         for index, item in enumerate(reversed(self.level_seqs)):
-            if title.startswith(tuple(item)) or title.endswith(tuple(item)):
+            if title.startswith(item) or title.endswith(item):
                 level = len(self.level_seqs) - index
                 self.level_seqs = self.level_seqs[:level]
                 return level
         # 若不在之前层级中，则追加新层级
         for item in self.oth_level_seqs_list:
-            if title.startswith(tuple(item)) and title.startswith(item[0]):
+            if title.startswith(item[0]):
                 self.level_seqs.append(item)
                 return len(self.level_seqs)
         return -1
@@ -332,9 +450,9 @@ class SplitDoc():
     def get_menu_list(self, titles):
         # 提取大纲
         outlines = [
-            {"index": idx, "content": para.get("content"), "level": para['level']}
+            {"index": idx, "content": para.content, "level": para.level}
             for idx, para in enumerate(self.paragraphs)
-            if para['level'] is not None and para['level'] < 10 and len(para['content']) < 80
+            if para.level is not None and para.level < 10 and len(para.content) < 80
         ]
         outline_indices = [outline["index"] for outline in outlines]
         # 修复层级
@@ -465,11 +583,21 @@ class SplitDoc():
             if not curr_breakcrumb_title:
                 continue
             if curr_breakcrumb_title["breakcrumb"] in section_dict:
-                section_dict.get(curr_breakcrumb_title["breakcrumb"]).append({"index": idx, "type": para.get("type"), "content": para.get("content"), "oxml": para.get("oxml")})
+                section_dict.get(curr_breakcrumb_title["breakcrumb"]).append({"index": idx, "type": para.type, "content": para.content, "oxml": para.oxml})
             else:
-                section_dict[curr_breakcrumb_title["breakcrumb"]] = [{"index": idx, "type": para.get("type"), "content": para.get("content"), "oxml": para.get("oxml")}]
+                section_dict[curr_breakcrumb_title["breakcrumb"]] = [{"index": idx, "type": para.type, "content": para.content, "oxml": para.oxml}]
         return section_dict
 
+    def get_doc_titles(self):
+        """获取标题列表，每个文档只识别一次"""
+        if self._doc_titles is None:
+            self._doc_titles = self.parse_doc_title()
+        return self._doc_titles
+
+    def invalidate_doc_titles(self):
+        """清除标题列表缓存，段落变化后需重新识别"""
+        self._doc_titles = None
+
     def parse_doc_title(self):
         # 大纲级别
         style_outline = self.build_style_outline_level()
@@ -483,28 +611,26 @@ class SplitDoc():
 
     def build_style_outline_level(self):
         style_map = {}
-        with zipfile.ZipFile(self.doc_path) as docx_zip:
-            styles_xml = docx_zip.read("word/styles.xml")
-            styles_root = parse_xml(styles_xml)
-            styles_ns = styles_root.nsmap
-            # 遍历所有样式
-            for style in styles_root.findall("w:style", styles_ns):
-                style_id = style.get(qn("w:styleId"))
-                based_on = style.find("w:basedOn", styles_ns)
-                base_id = based_on.get(qn("w:val")) if based_on is not None else None
-                if style_id is not None:
-                    # 大纲级别
-                    outline_lvl_el = style.find(".//w:outlineLvl", styles_ns)
-                    level = int(outline_lvl_el.get(qn("w:val"))) if outline_lvl_el is not None else 100
-                    # 自动编码
-                    numId_el = style.find(".//w:numPr/w:numId", styles_ns)
-                    numId = numId_el.get(qn("w:val")) if numId_el is not None else None
-                    ilvl_el = style.find(".//w:numPr/w:ilvl", styles_ns)
-                    ilvl = ilvl_el.get(qn("w:val")) if ilvl_el is not None else None
-                    style_map[style_id] = {"outlineLvl": level, "numId": numId, "ilvl": ilvl, "basedOn": base_id}
-            # 递归补齐缺失的 level
-            for sid in style_map:
-                style_map[sid]["outlineLvl"] = self._resolve_level(style_map, sid)
+        styles_root = self.loaded_doc.styles_element
+        styles_ns = styles_root.nsmap
+        # 遍历所有样式
+        for style in styles_root.findall("w:style", styles_ns):
+            style_id = style.get(qn("w:styleId"))
+            based_on = style.find("w:basedOn", styles_ns)
+            base_id = based_on.get(qn("w:val")) if based_on is not None else None
+            if style_id is not None:
+                # 大纲级别
+                outline_lvl_el = style.find(".//w:outlineLvl", styles_ns)
+                level = int(outline_lvl_el.get(qn("w:val"))) if outline_lvl_el is not None else 100
+                # 自动编码
+                numId_el = style.find(".//w:numPr/w:numId", styles_ns)
+                numId = numId_el.get(qn("w:val")) if numId_el is not None else None
+                ilvl_el = style.find(".//w:numPr/w:ilvl", styles_ns)
+                ilvl = ilvl_el.get(qn("w:val")) if ilvl_el is not None else None
+                style_map[style_id] = {"outlineLvl": level, "numId": numId, "ilvl": ilvl, "basedOn": base_id}
+        # 递归补齐缺失的 level
+        for sid in style_map:
+            style_map[sid]["outlineLvl"] = self._resolve_level(style_map, sid)
         return style_map
 
     def _resolve_level(self, style_map: Dict[str, Dict], style_id: str, depth=0) -> int:
@@ -529,65 +655,95 @@ class SplitDoc():
             return 100
 
     def fixed_paragraphs(self, style_outline, numbering_map):
-        for idx, para_info in enumerate(self.paragraphs):
+        for para_info in self.paragraphs:
             # 过滤非文本情况
-            if para_info.get("type") == "table":
+            if para_info.type == "table":
                 continue
             # 直接获取大纲级别
             _level = 100
-            style = para_info.get("style")
-            if style is not None and style.get("outlineLvl") is not None:
-                _level = min(style.get("outlineLvl"), _level)
-            elif style is not None and style.get("styleId") is not None:
-                style_info = style_outline.get(style.get("styleId"))
+            if para_info.outline_lvl is not None:
+                _level = min(para_info.outline_lvl, _level)
+            elif para_info.style_id is not None:
+                style_info = style_outline.get(para_info.style_id)
                 if style_info is not None:
                     _level = min(_level, style_info.get("outlineLvl", 100))
-            if style is not None and numbering_map.get((style.get("numId"), style.get("ilvl"))) is not None:
+            if numbering_map.get((para_info.num_id, para_info.ilvl)) is not None:
                 _level = min(9, _level)
-            self.paragraphs[idx]["level"] = _level
+            para_info.level = _level
 
     def get_numbering_num(self):
         """
         获取带序号格式的标题
         """
         num_mapping = {}
-        with zipfile.ZipFile(self.doc_path) as docx_zip:
-            if "word/numbering.xml" not in docx_zip.namelist():
-                return num_mapping
-            numbering_xml = docx_zip.read("word/numbering.xml")
-            numbering_root = parse_xml(numbering_xml)
-            numbering_ns = numbering_root.nsmap
-            for num in numbering_root.findall("w:num", numbering_ns):
-                numId = num.get(qn("w:numId"))
-                abstractNumId = num.find("w:abstractNumId", numbering_ns).get(qn("w:val"))
-                for abstractNum in numbering_root.findall("w:abstractNum", numbering_ns):
-                    if abstractNum.get(qn("w:abstractNumId")) == abstractNumId:
-                        for lvl in abstractNum.findall("w:lvl", numbering_ns):
-                            ilvl = lvl.get(qn("w:ilvl"))
-                            levelText = lvl.find("w:lvlText", numbering_ns).get(qn("w:val"))
-                            num_mapping[(numId, ilvl)] = levelText
+        numbering_root = self.loaded_doc.numbering_element
+        if numbering_root is None:
+            return num_mapping
+        numbering_ns = numbering_root.nsmap
+        for num in numbering_root.findall("w:num", numbering_ns):
+            numId = num.get(qn("w:numId"))
+            abstractNumId = num.find("w:abstractNumId", numbering_ns).get(qn("w:val"))
+            for abstractNum in numbering_root.findall("w:abstractNum", numbering_ns):
+                if abstractNum.get(qn("w:abstractNumId")) == abstractNumId:
+                    for lvl in abstractNum.findall("w:lvl", numbering_ns):
+                        ilvl = lvl.get(qn("w:ilvl"))
+                        levelText = lvl.find("w:lvlText", numbering_ns).get(qn("w:val"))
+                        num_mapping[(numId, ilvl)] = levelText
         return num_mapping
 
     def detect_title(self):
+        # 规则识别，无法判断的段落待大模型识别
+        verdicts = {}
+        pending_items = []
+
+        def _resolve_pending():
+            if TITLE_DETECT_CONFIG.get("batch"):
+                verdicts.update(self.is_titles_by_llm(pending_items))
+            else:
+                for item in pending_items:
+                    verdicts[item["index"]] = self.is_title_by_llm(item["text"], item["context"])
+            pending_items.clear()
+
+        for idx, paragraph in enumerate(self.paragraphs):
+            if paragraph.type == 'table':
+                continue
+            if self._is_first_level_title(paragraph.content):
+                verdicts[idx] = True
+                continue
+            _context = [para.content for para in self.paragraphs[(idx - 2 if idx - 2 >= 0 else 0):idx + 2] if para.type == 'text']
+            _is_potential_title = self._is_potential_title(paragraph)
+            if _is_potential_title is None:
+                pending_items.append({"index": idx, "text": paragraph.content, "context": _context})
+                # 待识别段落含“发行.*?有关机构”时先识别已排队段落，若其为标题则之后的段落无需识别
+                if ISSUE_AGENCY_PATTERN.search(paragraph.content):
+                    _resolve_pending()
+                    if verdicts.get(idx):
+                        break
+            else:
+                verdicts[idx] = _is_potential_title
+                # 之后的段落不会被使用，无需识别
+                if _is_potential_title and ISSUE_AGENCY_PATTERN.search(paragraph.content):
+                    break
+        _resolve_pending()
+
         titles = []
         for idx, paragraph in enumerate(self.paragraphs):
-            if paragraph.get("type") == 'table':
+            if paragraph.type == 'table':
                 continue
             # 一级标题识别
-            if self._is_first_level_title(paragraph.get("content")):
+            if self._is_first_level_title(paragraph.content):
                 titles.append({
                     "index": idx,
-                    "content": paragraph.get("content"),
+                    "content": paragraph.content,
                     "is_first_level": True,
                 })
                 continue
             # 普通标题识别
-            _context = [para.get('content') for para in self.paragraphs[(idx - 2 if idx - 2 >= 0 else 0):idx + 2] if para.get("type") == 'text']
-            if self._is_title(paragraph, _context):
+            if verdicts.get(idx):
                 # 若为标题且含有“发行.*?有关机构”
-                if bool(re.search(r"发行.*?有关机构", paragraph.get("content"))):
+                if ISSUE_AGENCY_PATTERN.search(paragraph.content):
                     break
-                titles.append({"index": idx, "content": paragraph.get("content"), "is_first_level": False})
+                titles.append({"index": idx, "content": paragraph.content, "is_first_level": False})
         return titles
 
     def table_data_format(self, target_tables):
@@ -600,7 +756,7 @@ class SplitDoc():
         for pretext_table in target_tables:
             preceding_text = pretext_table.get("pretext")
             tab_datas = pretext_table.get("darray")
-            para_elem = pretext_table.get("oxml")
+            para_elem = self._load_oxml(pretext_table.get("oxml"))
             tab_key = pretext_table.get("name")
             tab_unit = extract_unit(preceding_text)
             if tab_unit and "占比" in str(tab_datas) and "%" not in tab_unit:
@@ -807,8 +963,8 @@ class SplitDoc():
         muidx = 0
         # 遍历段落内容
         for paragraph in self.paragraphs:
-            if "text" == paragraph.get("type"):
-                text_data = paragraph.get("content")
+            if "text" == paragraph.type:
+                text_data = paragraph.content
                 # 判断当前文本是否为标题
                 if text_data == self.menus[muidx]:
                     muidx = muidx + 1
@@ -818,7 +974,7 @@ class SplitDoc():
                 if muidx + 1 >= len(self.menus):
                     muidx = len(self.menus) - 1
                 # 排除页眉页脚
-                if bool(re.search(r'^[0-9]+$', text_data)) or bool(re.search(r'.{6,}募集说明书$', text_data)):
+                if PAGE_NUM_PATTERN.search(text_data) or PAGE_HEADER_PATTERN.search(text_data):
                     continue
                 # 排除多个单位
                 if text_data.startswith("单位") and recent_paragraphs and recent_paragraphs[-1].startswith("单位"):
@@ -827,16 +983,18 @@ class SplitDoc():
                 recent_paragraphs.append(text_data)
                 if len(recent_paragraphs) > 2:
                     recent_paragraphs.pop(0)
-            elif "table" == paragraph.get("type"):
+            elif "table" == paragraph.type:
                 if not current_menu:
                     continue
-                table_data = paragraph.get("content")
-                para_elem = paragraph.get("oxml")
+                table_data = paragraph.content
+                para_elem = paragraph.oxml
                 # 如果出现连续表格，说明属于同一张表，合并数据
                 if table_context_list and not recent_paragraphs:
                     befare_table = table_context_list[-1]
                     befare_table["darray"].extend(table_data)
                     befare_table["content"] = "\n".join(["\t".join(row) for row in befare_table["darray"]][0:40])
+                    befare_table["oxml"] = self._load_oxml(befare_table["oxml"])
+                    para_elem = self._load_oxml(para_elem)
                     rows = para_elem.findall(".//{http://schemas.openxmlformats.org/wordprocessingml/2006/main}tr")
                     for row in rows:
                         befare_table["oxml"].append(row)
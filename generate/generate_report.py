@@ -9,25 +9,34 @@ from utils.file_util import *
 from utils.string_util import *
 from utils.log_utils import get_logger
 from utils.get_pf_api import CreditApprovalFetcher
+from utils.title_index import TitleIndex
+from utils.prompt_packer import pack_prompt
+from utils.financial_table_util import extract_balance_sheet_items, extract_interest_bearing_debt
+from utils.concurrent_util import run_task_graph
+from config.config import CONCURRENCY_CONFIG
 from docx import Document
 from structured.gen_dynamic_sections import ComprehensiveReportGenerator
 logger = get_logger()
 
 
 class UrbanReport():
-    def __init__(self, request_data, company_name, root_data_dir):
+    def __init__(self, request_data, company_name, root_data_dir, prospectus_doc=None):
         # 路径信息
         self.root_data_dir = root_data_dir
         self.request_data = request_data
         self.external_data_dir = os.path.join(root_data_dir, f"{company_name}/external_data")
         self.company_name = company_name
         self.prospectus_doc_path = None
+        # 已加载的募集说明书（LoadedDoc），与募集说明书路径一致时复用
+        self.prospectus_doc = prospectus_doc
         self.start_time = None
 
         # 解析的数据信息
         self.table_datas = {}
         self.table_oxmls = {}
         self.article_datas = {}
+        # 文本标题索引
+        self.title_index = None
         self.company_info = {}
         self.fuzhai_total = None
         self.element = "【债券要素提取错误】"
@@ -52,9 +61,11 @@ class UrbanReport():
         self.comprehensive_generator = ComprehensiveReportGenerator(company_name)
 
     def prepare_data(self):
+        # 文本数据重建，标题索引失效
+        self.title_index = None
 
         # 募集说明书
-        prospectusDoc = SplitDoc(self.prospectus_doc_path, self.company_name)
+        prospectusDoc = SplitDoc(self.prospectus_doc_path, self.company_name, self.prospectus_doc)
         # 解析文本信息
         prospectusDoc.extract_paragraphs()
         self.company_info = prospectusDoc.company_info
@@ -117,14 +128,10 @@ class UrbanReport():
             self.table_oxmls[oxml_title] = last_oxml_data
 
         # 提取并计算风险信息
-        if self.table_datas.get("资产负债表"):
-            assets_total = self.risk_for_assets_liabilities(self.table_datas["资产负债表"])
-        if self.table_datas.get("营业收入"):
-            self.risk_for_operating_revenue(self.table_datas["营业收入"])
-        if self.table_datas.get("有息负债"):
-            self.risk_for_interest_bearing_debt(self.table_datas["有息负债"])
-        if self.table_datas.get("受限资产"):
-            self.risk_for_restricted_assets(self.table_datas["受限资产"], assets_total)
+        self.extract_risks()
+
+        # 构建文本标题索引
+        self._get_title_index()
 
     def _extract_non_standard_financing(self):
         """从有息负债表中提取非标融资数据"""
@@ -201,7 +208,48 @@ class UrbanReport():
             logger.exception(f"提取非标融资失败: {e}")
 
 
-    def risk_for_restricted_assets(self, table, assets_total):
+    def extract_risks(self):
+        """
+        提取并计算风险信息：受限资产依赖资产负债表的总资产，其余并发提取；
+        各风险方法写入独立列表，完成后按固定顺序合并，保证风险点顺序稳定
+        """
+        assets_result = {"total": None}
+
+        def _assets_task():
+            collected = self._collect_risk(self.risk_for_assets_liabilities, self.table_datas["资产负债表"])
+            assets_result["total"] = collected[0]
+            return collected
+
+        risk_tasks = {}
+        if self.table_datas.get("资产负债表"):
+            risk_tasks["资产负债表"] = (_assets_task, [])
+        if self.table_datas.get("营业收入"):
+            risk_tasks["营业收入"] = (
+                lambda: self._collect_risk(self.risk_for_operating_revenue, self.table_datas["营业收入"]), [])
+        if self.table_datas.get("有息负债"):
+            risk_tasks["有息负债"] = (
+                lambda: self._collect_risk(self.risk_for_interest_bearing_debt, self.table_datas["有息负债"]), [])
+        if self.table_datas.get("受限资产"):
+            risk_tasks["受限资产"] = (
+                lambda: self._collect_risk(self.risk_for_restricted_assets, self.table_datas["受限资产"],
+                                           assets_result["total"]),
+                ["资产负债表"] if "资产负债表" in risk_tasks else [])
+        risk_results = run_task_graph(risk_tasks)
+        for risk_name in ["资产负债表", "营业收入", "有息负债", "受限资产"]:
+            if risk_name in risk_results:
+                _, risk, risk_evaluate = risk_results[risk_name]
+                self.risk.extend(risk)
+                self.risk_evaluate.extend(risk_evaluate)
+
+    def _collect_risk(self, risk_func, *args):
+        """调用风险方法，风险信息写入独立列表，返回(方法结果, 风险点, 风险评价)"""
+        risk, risk_evaluate = [], []
+        result = risk_func(*args, risk=risk, risk_evaluate=risk_evaluate)
+        return result, risk, risk_evaluate
+
+    def risk_for_restricted_assets(self, table, assets_total, risk=None, risk_evaluate=None):
+        risk = self.risk if risk is None else risk
+        risk_evaluate = self.risk_evaluate if risk_evaluate is None else risk_evaluate
         llm_prompt = [{
             "role": "user",
             "content": f"""/no_think
@@ -226,10 +274,12 @@ class UrbanReport():
         if restricted_assets and assets_total:
             proportion = restricted_assets / assets_total
             if proportion > 0.2:
-                self.risk_evaluate.append(f"受限资产占总收入比例超{round(proportion * 10 + 1) * 10}%")
-                self.risk.append(f"受限资产占比高：截至{restricted_assets_date}，发行人总资产{round(assets_total, 2)}亿元，其中受限资产{round(restricted_assets, 2)}亿元，受限资产占总收入比例超{round(proportion * 100, 2)}%。")
+                risk_evaluate.append(f"受限资产占总收入比例超{round(proportion * 10 + 1) * 10}%")
+                risk.append(f"受限资产占比高：截至{restricted_assets_date}，发行人总资产{round(assets_total, 2)}亿元，其中受限资产{round(restricted_assets, 2)}亿元，受限资产占总收入比例超{round(proportion * 100, 2)}%。")
 
-    def risk_for_interest_bearing_debt(self, table):
+    def risk_for_interest_bearing_debt(self, table, risk=None, risk_evaluate=None):
+        risk = self.risk if risk is None else risk
+        risk_evaluate = self.risk_evaluate if risk_evaluate is None else risk_evaluate
         try:
             table_data = table.get("data")
             if table_data[0][0] == "项目" and "合计" in table_data[-1][0]:
@@ -248,24 +298,27 @@ class UrbanReport():
                     table["data"] = res_table
         except Exception as e:
             logger.exception(f"youxi table handle error:{e}")
-        llm_prompt = [{
-            "role": "user",
-            "content": f"""/no_think
-            你是金融文档分析专家，请从“有息负债表格”中提取关键信息，并以JSON格式输出：
-            1. 提取短期债务（一年期以内）金额，直接取表格最后的合计数据，如果没有则不提取。
-            2. 解析表格中是否有多个时间序列，如果有，就对各时间序列的数据做出划分。
-            3. 提取有息负债总额，如果有多个值，必须取最新的一期。
-            4. 根据表格标题或表格表头，提取统计时间，如果有多个时间序列，必须取最新的一期，格式如：'xxxx年xx月末'、'xxxx年末'，如果没有则不提取。
-            5. 结果以JSON格式输出。
-            【有息负债表格】
-            {table['data']}
-            【表格标题】
-            {table.get('preceding_text', "")}
-            【结果输出】
-            {{"短期债务":0.0,"有息负债总额":0.0,"统计时间":""}}
-            """
-        }]
-        _result_json = json.loads(self.private_apply_instance.generate(llm_prompt))
+        # 期限结构表可直接定位合计行时不调用大模型
+        _result_json = extract_interest_bearing_debt(table)
+        if _result_json is None:
+            llm_prompt = [{
+                "role": "user",
+                "content": f"""/no_think
+                你是金融文档分析专家，请从“有息负债表格”中提取关键信息，并以JSON格式输出：
+                1. 提取短期债务（一年期以内）金额，直接取表格最后的合计数据，如果没有则不提取。
+                2. 解析表格中是否有多个时间序列，如果有，就对各时间序列的数据做出划分。
+                3. 提取有息负债总额，如果有多个值，必须取最新的一期。
+                4. 根据表格标题或表格表头，提取统计时间，如果有多个时间序列，必须取最新的一期，格式如：'xxxx年xx月末'、'xxxx年末'，如果没有则不提取。
+                5. 结果以JSON格式输出。
+                【有息负债表格】
+                {table['data']}
+                【表格标题】
+                {table.get('preceding_text', "")}
+                【结果输出】
+                {{"短期债务":0.0,"有息负债总额":0.0,"统计时间":""}}
+                """
+            }]
+            _result_json = json.loads(self.private_apply_instance.generate(llm_prompt))
         if "亿" not in table['unit']:
             _result_json = self.unit_conversion(_result_json, table['unit'])
         short_term_debt = float(_result_json["短期债务"]) if _result_json["短期债务"] else _result_json["短期债务"]
@@ -275,30 +328,35 @@ class UrbanReport():
         if short_term_debt and interest_bearing_debt:
             proportion = short_term_debt / interest_bearing_debt
             if proportion > 0.3:
-                self.risk_evaluate.append(f"短期债务占有息负债比例超{round(proportion * 10 + 1) * 10}%")
-                self.risk.append(
+                risk_evaluate.append(f"短期债务占有息负债比例超{round(proportion * 10 + 1) * 10}%")
+                risk.append(
                     f"短期债务压力大：截至{debt_date}，发行人有息债务{round(interest_bearing_debt, 2)}亿元，其中短期债务{round(short_term_debt, 2)}亿元，占比{round(proportion * 100, 2)}%。")
 
-    def risk_for_assets_liabilities(self, table):
-        llm_prompt = [{
-            "role": "user",
-            "content": f"""/no_think
-            你是金融文档分析专家，请从“资产负债表格”中提取关键信息，并以JSON格式输出：
-            1. 提取最近一年的其他应收款，如果没有则不提取；
-            1. 提取最近一年的存货，如果没有则不提取；
-            2. 提取最近一年的流动资产，如果没有则不提取；
-            3. 提取最近一年的资产总计，如果没有则不提取；
-            4. 根据表格标题和表头最新的时间序列，提取报告截至日期，格式如'X年X月末'或'X年末'，如果没有则不提取；
-            5. 结果以JSON格式输出；
-            【资产负债表格】
-            {table['data']}
-            【表格标题】
-            {table.get('preceding_text', "")}
-            【结果输出】
-            {{"其他应收款":0.0,"存货":0.0,"流动资产":0.0,"资产总计":0.0,"报告截至日期":""}}
-            """
-        }]
-        _result_json = json.loads(self.private_apply_instance.generate(llm_prompt))
+    def risk_for_assets_liabilities(self, table, risk=None, risk_evaluate=None):
+        risk = self.risk if risk is None else risk
+        risk_evaluate = self.risk_evaluate if risk_evaluate is None else risk_evaluate
+        # 规范化后的资产负债表直接按行标签取值，缺少资产总计行时再调用大模型
+        _result_json = extract_balance_sheet_items(table)
+        if _result_json is None:
+            llm_prompt = [{
+                "role": "user",
+                "content": f"""/no_think
+                你是金融文档分析专家，请从“资产负债表格”中提取关键信息，并以JSON格式输出：
+                1. 提取最近一年的其他应收款，如果没有则不提取；
+                1. 提取最近一年的存货，如果没有则不提取；
+                2. 提取最近一年的流动资产，如果没有则不提取；
+                3. 提取最近一年的资产总计，如果没有则不提取；
+                4. 根据表格标题和表头最新的时间序列，提取报告截至日期，格式如'X年X月末'或'X年末'，如果没有则不提取；
+                5. 结果以JSON格式输出；
+                【资产负债表格】
+                {table['data']}
+                【表格标题】
+                {table.get('preceding_text', "")}
+                【结果输出】
+                {{"其他应收款":0.0,"存货":0.0,"流动资产":0.0,"资产总计":0.0,"报告截至日期":""}}
+                """
+            }]
+            _result_json = json.loads(self.private_apply_instance.generate(llm_prompt))
         if "亿" not in table['unit']:
             _result_json = self.unit_conversion(_result_json, table['unit'])
         assets_qita = float(_result_json["其他应收款"]) if _result_json["其他应收款"] else _result_json["其他应收款"]
@@ -320,18 +378,20 @@ class UrbanReport():
                 elif assets_cunhuo:
                     sub_str = f"其中存货{round(assets_cunhuo, 2)}亿元，"
                     risk_sub_str = "存货"
-                self.risk.append(
+                risk.append(
                     f"资产流动性差：截至{assets_time}，发行人总资产{round(assets_total, 2)}亿元，{sub_str}合计占总资产比例{round(proportion * 100, 2)}%。")
-                self.risk_evaluate.append(f"{risk_sub_str}合计占总资产比例超{round(proportion * 10 + 1) * 10}%")
+                risk_evaluate.append(f"{risk_sub_str}合计占总资产比例超{round(proportion * 10 + 1) * 10}%")
         if assets_flow and assets_total:
             proportion_flow = float(assets_flow) / float(assets_total)
             if proportion_flow < 0.4:
-                self.risk.append(
+                risk.append(
                     f"流动资产占比低：截至{assets_time}，发行人总资产{round(assets_total, 2)}亿元，其中流动资产{round(assets_flow, 2)}亿元，占比{round(proportion_flow * 100, 2)}%。")
-                self.risk_evaluate.append(f"流动资产占比不足{round(proportion_flow * 10 - 1) * 10}%")
+                risk_evaluate.append(f"流动资产占比不足{round(proportion_flow * 10 - 1) * 10}%")
         return assets_total
 
-    def risk_for_operating_revenue(self, table):
+    def risk_for_operating_revenue(self, table, risk=None, risk_evaluate=None):
+        risk = self.risk if risk is None else risk
+        risk_evaluate = self.risk_evaluate if risk_evaluate is None else risk_evaluate
         llm_prompt = [{
             "role": "user",
             "content": f"""/no_think
@@ -359,24 +419,28 @@ class UrbanReport():
 
         if len(amounts) == 2 and float(amounts[0]) / float(amounts[1]) < 0.9:
             amounts_ratio = round((1 - (amounts[0] / amounts[1])) * 100, 2)
-            self.risk_evaluate.append("年度营业收入同比下降超10%")
+            risk_evaluate.append("年度营业收入同比下降超10%")
             if amounts_recently:
-                self.risk.append(
+                risk.append(
                     f"年度营业收入下降：近两年及一期，发行人分别实现营业收入{round(amounts[1], 2)}亿元、{round(amounts[0], 2)}亿元、{round(amounts_recently, 2)}亿元,年度营业收入同比下降{amounts_ratio}%。")
             else:
-                self.risk.append(
+                risk.append(
                     f"年度营业收入下降：近两年，发行人分别实现营业收入{round(amounts[1], 2)}亿元、{round(amounts[0], 2)}亿元,年度营业收入同比下降{amounts_ratio}%。")
         if trade_amount and trade_amount[0] / amounts[0] > 0.3:
             trade_ratio = round(trade_amount[0] / amounts[0] * 100, 2)
-            self.risk_evaluate.append("年度非贸易收入同比下降超10%")
+            risk_evaluate.append("年度非贸易收入同比下降超10%")
             if trade_amount_recently:
-                self.risk.append(
+                risk.append(
                     f"贸易收入占比高：近两年及一期，发行人分别实现营业收入{round(amounts[1], 2)}亿元、{round(amounts[0], 2)}亿元、{round(amounts_recently, 2)}亿元，其中贸易收入分别为{round(trade_amount_recently, 2)}亿元、{round(trade_amount[0], 2)}亿元、{round(trade_amount[1], 2)}亿元，占比{round(trade_amount_recently / amounts_recently * 100, 2)}%、{trade_ratio}%、{round(trade_amount[1] / amounts[1] * 100, 2)}%。")
             else:
-                self.risk.append(
+                risk.append(
                     f"贸易收入占比高：近两年，发行人分别实现营业收入{round(amounts[1], 2)}亿元、{round(amounts[0], 2)}亿元，其中贸易收入分别为{round(trade_amount[0], 2)}亿元、{round(trade_amount[1], 2)}亿元，占比{trade_ratio}%、{round(trade_amount[1] / amounts[1] * 100, 2)}%。")
 
     def unit_conversion(self, input_str, unit):
+        # 可识别的金额单位本地换算，无法识别时再调用大模型
+        if unit_scale(unit) is not None:
+            return normalize_amounts(input_str, unit)
+        logger.debug(f"无法识别的单位：{unit}，调用大模型转换")
         llm_prompt = [{
             "role": "user",
             "content": f"""
@@ -407,16 +471,22 @@ class UrbanReport():
                 _txt_kws.append(_kw)
         if len(_txt_kws) == 0:
             return _data
-        for _title, _context in self.article_datas.items():
-            if lw_type == "without_guarantor" and exists_keyword(_title, ["(增信|信用增进)"]):
-                continue
+        for _title in self._get_title_index().search(_txt_kws, view=lw_type):
+            _context = self.article_datas[_title]
             # 内容为（x）开头的会被误认为标题而被过滤，这里添加此类内容
-            if exists_keyword(_title, _txt_kws) and not _context and _title not in _data:
+            if not _context and _title not in _data:
                 _data.append(_title)
-            if exists_keyword(_title, _txt_kws) and len(_context) > 0:
+            if len(_context) > 0:
                 _data.extend(_context)
         return _data
 
+    def _get_title_index(self):
+        """标题索引，prepare_data 中文本数据合并完成后构建一次，重建文本数据时置为None"""
+        if self.title_index is None:
+            self.title_index = TitleIndex(self.article_datas.keys(),
+                                          exclude_views={"without_guarantor": ["(增信|信用增进)"]})
+        return self.title_index
+
     def _get_reply_cust(self, issuer, reply_cust_list):
         for reply_cust in reply_cust_list:
             if issuer == reply_cust.get("custName", ""):
@@ -482,12 +552,12 @@ class UrbanReport():
                 _chapter_data.append(
                     {"data_src": [""], "type": "text", "context": f"【批复内容不包含客户（{issuer}）信息】"})
             elif reply_cust:
-                _result = self.private_apply_instance.private_credit_approval(issuer, str(reply_info)[:30000],
+                _result = self.private_apply_instance.private_credit_approval(issuer, pack_prompt(reply_info),
                                                                               reply_date)
                 _result = _result.replace("我行", f"{reply_cust}批复", 1)
                 _chapter_data.append({"data_src": [""], "type": "text", "context": _result})
             else:
-                _result = self.private_apply_instance.private_credit_approval(issuer, str(reply_info)[:30000],
+                _result = self.private_apply_instance.private_credit_approval(issuer, pack_prompt(reply_info),
                                                                               reply_date)
                 _chapter_data.append({"data_src": [""], "type": "text", "context": _result})
         else:
@@ -536,7 +606,7 @@ class UrbanReport():
         _param_list = self.search_by_keywords(_keywords, lw_type="without_guarantor")
         _param_list_credit = self.search_by_keywords(_keywords_credit, lw_type="without_guarantor")
         _result = self.private_apply_instance.private_para4(
-            str(_param_list)[:30000] + f"/n【授信申请方案】/n{_param_list_credit}")
+            pack_prompt(_param_list, keywords=[_kw for _, _kw in _keywords]) + f"/n【授信申请方案】/n{_param_list_credit}")
         # 风险评价意见模块使用
         self.element = _result
         _chapter_data.append({"data_src": [""], "type": "text", "context": _result})
@@ -552,7 +622,7 @@ class UrbanReport():
                       ('tab', '发行主体评级')]
         _param_list1 = self.search_by_keywords(_keywords1)
         if len(_param_list1) > 0:
-            _result1 = self.private_apply_instance.private_faxing_condition(str(_param_list1)[:30000])
+            _result1 = self.private_apply_instance.private_faxing_condition(pack_prompt(_param_list1, keywords=[_kw for _, _kw in _keywords1]))
             _chapter_data.append({"data_src": [""], "type": "text", "context": _result1})
         else:
             _chapter_data.append({"data_src": [""], "type": "text", "context": "发行人基本概况【无】"})
@@ -917,7 +987,7 @@ class UrbanReport():
         _keywords1 = [('tab', '资产负债表')]
         _param_list1 = self.search_by_keywords(_keywords1)
         if _param_list1:
-            _result1 = self.private_apply_instance.private_6para_first(str(_param_list1)[:30000])
+            _result1 = self.private_apply_instance.private_6para_first(pack_prompt(_param_list1))
             _chapter_data.append({"data_src": [""], "type": "text", "context": _result1})
         else:
             _chapter_data.append({"data_src": [""], "type": "text", "context": "资产详情【无】"})
@@ -969,7 +1039,7 @@ class UrbanReport():
         _keywords7 = [('tab', '资产负债表')]
         _param_list7 = self.search_by_keywords(_keywords7)
         if _param_list7:
-            _result7 = self.private_apply_instance.private_6para_fuzhai(str(_param_list7)[:30000])
+            _result7 = self.private_apply_instance.private_6para_fuzhai(pack_prompt(_param_list7))
             _chapter_data.append({"data_src": [""], "type": "text", "context": _result7})
         else:
             _chapter_data.append({"data_src": [""], "type": "text", "context": "负债详情【无】"})
@@ -998,7 +1068,7 @@ class UrbanReport():
                         _param_list8[0]["data"] = res_table
             except Exception as e:
                 logger.exception(e)
-            _result8 = self.private_apply_instance.private_6para_youxifuzhai(str(_param_list8)[:30000],
+            _result8 = self.private_apply_instance.private_6para_youxifuzhai(pack_prompt(_param_list8),
                                                                              self.fuzhai_total)
             _chapter_data.append({"data_src": [""], "type": "text", "context": _result8})
         else:
@@ -1029,7 +1099,7 @@ class UrbanReport():
         _param_list10 = self.search_by_keywords(_keywords10)
         if _param_list10 and len(_param_list10) > 0:
             # 先输出文字分析
-            _result10 = self.private_apply_instance.private_6para_shouxinedu(str(_param_list10[0])[:30000])
+            _result10 = self.private_apply_instance.private_6para_shouxinedu(pack_prompt(_param_list10[0]))
             if _result10:
                 _chapter_data.append({"data_src": [""], "type": "text", "context": _result10})
 
@@ -1049,7 +1119,7 @@ class UrbanReport():
         if not _param_list11:
             _chapter_data.append({"data_src": [""], "type": "text", "context": _result11})
         else:
-            _result11 = self.private_apply_instance.private_6para_xianjinliu(str(_param_list11)[:30000])
+            _result11 = self.private_apply_instance.private_6para_xianjinliu(pack_prompt(_param_list11))
             _chapter_data.append({"data_src": [""], "type": "text",
                                   "context": f"发行人现金流情况如下：{' ' * 6}单位：{_param_list11[0]['unit']}"})
             _chapter_data.append({"data_src": [""], "type": "xtab", "context": _param_list11[0]['oxml']})
@@ -1074,7 +1144,7 @@ class UrbanReport():
         else:
             # 先输出LLM总结
             if _param_for_summary:
-                _result12 = self.private_apply_instance.private_6para_danbao(str(_param_for_summary)[:30000])
+                _result12 = self.private_apply_instance.private_6para_danbao(pack_prompt(_param_for_summary))
                 _chapter_data.append({"data_src": [""], "type": "text", "context": _result12})
 
             # 再输出完整的对外担保表格
@@ -1107,7 +1177,7 @@ class UrbanReport():
             _chapter_data.append({"data_src": [""], "type": "text", "context": '无'})
             return _chapter_data
 
-        _result1 = self.private_apply_instance.private_6para_baozhengren(str(_param_list1)[:30000])
+        _result1 = self.private_apply_instance.private_6para_baozhengren(pack_prompt(_param_list1, keywords=[_kw for _, _kw in _keywords1]))
         context = '无' if _result1 is None else _result1
         _chapter_data.append({"data_src": [""], "type": "text", "context": context})
         return _chapter_data
@@ -1225,28 +1295,42 @@ class UrbanReport():
         report_datas = []
         # 数据准备
         self.prepare_data()
+        # 章节生成任务：章节 -> (生成函数, 依赖章节)，无依赖的章节并发生成
+        chapter_tasks = {
+            "chapter2": (self.gen_data_chapter2, []),
+            "chapter3": (self.gen_data_chapter3, []),
+            "chapter4": (self.gen_data_chapter4, []),
+            "chapter5": (self.gen_data_chapter5, []),
+            "chapter6": (self.gen_data_chapter6, []),
+            "chapter7": (self.gen_data_chapter7, []),
+            "chapter8": (self.gen_data_chapter8, []),
+            # 发起部门意见依赖拟投债券要素（self.element）
+            "chapter9": (self.gen_data_chapter9, ["chapter4"]),
+            "chapter10": (self.gen_data_chapter10, []),
+        }
+        chapters = run_task_graph(chapter_tasks, CONCURRENCY_CONFIG.get("chapter_max_workers"))
         # 一、合作方案
         report_datas.append({"title": "一、合作方案", "paragraphs": [{"data_src": [""], "type": "text", "context": "\n\n\n\n\n"}]})
         # 二、存量合作情况及我行政策
-        report_datas.append({"title": "二、存量合作情况及我行政策", "paragraphs": self.gen_data_chapter2()})
+        report_datas.append({"title": "二、存量合作情况及我行政策", "paragraphs": chapters["chapter2"]})
         # 三、区域经济情况
-        report_datas.append({"title": "三、区域经济情况", "paragraphs": self.gen_data_chapter3()})
+        report_datas.append({"title": "三、区域经济情况", "paragraphs": chapters["chapter3"]})
         # 四、拟投债券要素
-        report_datas.append({"title": "四、拟投债券要素", "paragraphs": self.gen_data_chapter4()})
+        report_datas.append({"title": "四、拟投债券要素", "paragraphs": chapters["chapter4"]})
         # 五、发行人概况
-        report_datas.append({"title": "五、发行人概况", "paragraphs": self.gen_data_chapter5()})
+        report_datas.append({"title": "五、发行人概况", "paragraphs": chapters["chapter5"]})
         # 六、财务情况
-        report_datas.append({"title": "六、财务情况", "paragraphs": self.gen_data_chapter6()})
+        report_datas.append({"title": "六、财务情况", "paragraphs": chapters["chapter6"]})
         # 七、保证人
-        report_datas.append({"title": "七、保证人", "paragraphs": self.gen_data_chapter7()})
+        report_datas.append({"title": "七、保证人", "paragraphs": chapters["chapter7"]})
         # 八、优势
         report_datas.append({"title": "八、优势", "paragraphs": [{"data_src": [""], "type": "text", "context": "\n\n\n\n\n"}]})
         # 九、风险点
-        report_datas.append({"title": "九、风险点", "paragraphs": self.gen_data_chapter8()})
+        report_datas.append({"title": "九、风险点", "paragraphs": chapters["chapter8"]})
         # 十、发起部门意见
-        report_datas.append({"title": "十、发起部门意见", "paragraphs": self.gen_data_chapter9()})
+        report_datas.append({"title": "十、发起部门意见", "paragraphs": chapters["chapter9"]})
         # 十一、授信调查声明
-        report_datas.append({"title": "                        授信调查声明", "paragraphs": self.gen_data_chapter10()})
+        report_datas.append({"title": "                        授信调查声明", "paragraphs": chapters["chapter10"]})
 
         return report_datas
 
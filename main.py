@@ -8,12 +8,18 @@ from data.db_data.ctz_data_download import DataDownload
 from data.doc_data.organize_doc import OrganizeDoc
 from generate.generate_report import UrbanReport
 from utils.log_utils import get_logger
+from utils.llm_cache import get_llm_cache
+from utils.db_util import get_pool_metrics
+from utils.llm_trace import start_trace, end_trace, trace_stage
 
 logger = get_logger()
 
-def main(task_dir):
+def process_task(task_dir):
+    """生成单个任务的报告并写出response.json，返回response"""
     logger.info(f"xin yong zhai diao cha report process start.source path: {task_dir}")
     start_time  = time.time()
+    start_trace(os.path.basename(os.path.normpath(task_dir)))
+    pool_metrics_start = get_pool_metrics()
     request_file = os.path.join(task_dir, "request.json")
     response = {"resCode": 1,"resMsg": "succeed","resFiles": []}
 
@@ -28,16 +34,19 @@ def main(task_dir):
     # 生成报告
     try:
         # 1. 文件转换 doc-> docx | docx-> pdf
-        od = OrganizeDoc(task_dir)
-        company_name = od.organize()
+        with trace_stage("organize"):
+            od = OrganizeDoc(task_dir)
+            company_name = od.organize()
         company_name = request.get("custName") or company_name
 
         # 2. 数据库数据下载
-        dd = DataDownload(task_dir)
-        dd.extract_data(convert_com_name(company_name))
+        with trace_stage("download"):
+            dd = DataDownload(task_dir)
+            dd.extract_data(convert_com_name(company_name))
         # 3. 报告生成
-        report = UrbanReport(request, company_name, task_dir)
-        output_file = report.gen_report()
+        with trace_stage("report"):
+            report = UrbanReport(request, company_name, task_dir, od.prospectus_doc)
+            output_file = report.gen_report()
         # 处理结果
         report_name = os.path.basename(output_file)
         response["resFiles"] = [report_name]
@@ -46,12 +55,25 @@ def main(task_dir):
         response["resCode"] = 0
         response["resMsg"] = f"文件生成失败！{str(e)}"
     finally:
+        logger.info(f"llm cache stats: {get_llm_cache().stats()}")
+        # 连接池为进程内共享，常驻工作进程并发处理任务时增量包含同期其他任务
+        logger.info(f"db pool metrics during task (process-wide): {get_pool_metrics(pool_metrics_start)}")
+        try:
+            trace_summary = end_trace(os.path.join(task_dir, "llm_trace.json"))
+            logger.info(f"llm trace summary: {json.dumps(trace_summary, ensure_ascii=False)}")
+        except Exception as e:
+            logger.error(f"写入大模型调用追踪失败：{e}")
         logger.info(f"xin yong zhai diao cha report process end.cost time: {time.time() - start_time}")
 
     # 结果处理
     response_file = os.path.join(task_dir, "response.json")
     with open(response_file, "w") as f:
         json.dump(response, f, ensure_ascii=False)
+    return response
+
+
+def main(task_dir):
+    process_task(task_dir)
 
 if __name__ == '__main__':
     task_dir = sys.argv[1]
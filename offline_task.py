@@ -2,31 +2,45 @@ import time
 import os
 import logging
 import json
+import signal
+import argparse
+import multiprocessing
+from multiprocessing.connection import wait
 
 from data.doc_data.organize_doc import OrganizeDoc
 from data.db_data.ctz_data_download import DataDownload
 from generate.generate_report import UrbanReport
 from utils.file_util import convert_com_name, rmdir
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from utils.llm_cache import get_llm_cache
+from utils.llm_gateway import get_client
+from config.config import BACKFILL_CONFIG
+
+
+class TaskTimeout(BaseException):
+    """单个任务超时；继承BaseException，避免被报告生成流程中的 except Exception 捕获后转为普通异常"""
+    pass
+
+
+def regenerate(source_path):
+    with open(os.path.join(source_path, "request.json")) as f:
+        req = f.read()
+    req_json = json.loads(req)
+    od = OrganizeDoc(source_path)
+    com = od.organize()
+    com = req_json.get("custName") or com
+    print(f"com: {com}")
+    external_data_path = os.path.join(source_path, "external_data")
+    # rmdir(external_data_path)
+    # DataDownload(source_path).extract_data(convert_com_name(com))
+
+    # com = "淮安市淮阴区城市资产经营有限公司"
+    report = UrbanReport(req_json, com, source_path, od.prospectus_doc)
+    return report.gen_report()
 
-executor = ThreadPoolExecutor(max_workers=1)
 
 def run(source_path):
     try:
-        with open(os.path.join(source_path, "request.json")) as f:
-            req = f.read()
-        req_json = json.loads(req)
-        od = OrganizeDoc(source_path)
-        com = od.organize()
-        com = req_json.get("custName") or com
-        print(f"com: {com}")
-        external_data_path = os.path.join(source_path, "external_data")
-        # rmdir(external_data_path)
-        # DataDownload(source_path).extract_data(convert_com_name(com))
-
-        # com = "淮安市淮阴区城市资产经营有限公司"
-        report = UrbanReport(req_json, com, source_path)
-        report.gen_report()
+        regenerate(source_path)
     except Exception as e:
         logging.exception(e)
 
@@ -66,12 +80,195 @@ def get_ctz_file_lists():
                         res.append(root)
     return res
 
-if __name__ == "__main__":
-    # 城投债
-    run("/home/datagov/INSTANCE/projects/report_xyzdc/files/test1") # 都江堰兴市集团有限责任公司
-    try:
-        print(1)
+def _init_backfill_worker():
+    """进程初始化：预先建立大模型客户端及缓存连接，进程内各任务复用"""
+    get_client()
+    get_llm_cache()
+
 
+def _on_timeout(signum, frame):
+    raise TaskTimeout()
+
+
+def _backfill_one(source_path, timeout):
+    """
+    在工作进程中重跑单个任务；超时时SIGALRM抛出TaskTimeout尽量正常结束，
+    无法及时结束（如等待线程池中的大模型调用）时由父进程强制终止该工作进程
+    """
+    start_time = time.time()
+    record = {"task_dir": source_path, "status": "succeed", "error": None}
+    signal.signal(signal.SIGALRM, _on_timeout)
+    signal.alarm(int(timeout) if timeout else 0)
+    try:
+        regenerate(source_path)
+    except TaskTimeout:
+        record.update(status="timeout", error=f"超过{timeout}秒未完成")
+    except Exception as e:
+        logging.exception(e)
+        record.update(status="failed", error=f"{type(e).__name__}: {e}")
     finally:
-        print("end.................")
-        executor.shutdown(wait=True)
\ No newline at end of file
+        signal.alarm(0)
+    record.update(elapsed=round(time.time() - start_time, 3), finished_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+    return record
+
+
+def _backfill_worker(conn, timeout):
+    """常驻工作进程：逐个接收任务目录并返回执行结果，收到None时退出"""
+    _init_backfill_worker()
+    while True:
+        try:
+            source_path = conn.recv()
+        except EOFError:
+            break
+        if source_path is None:
+            break
+        conn.send(_backfill_one(source_path, timeout))
+    conn.close()
+
+
+class _BackfillWorker:
+    """父进程持有的工作进程句柄及其当前任务"""
+
+    def __init__(self, timeout):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_backfill_worker, args=(child_conn, timeout))
+        self.process.start()
+        child_conn.close()
+        self.task_dir = None
+        self.task_start = None
+        self.deadline = None
+
+    def assign(self, task_dir, deadline_seconds):
+        self.conn.send(task_dir)
+        self.task_dir = task_dir
+        self.task_start = time.time()
+        self.deadline = self.task_start + deadline_seconds if deadline_seconds else None
+
+    def release(self):
+        task_dir, self.task_dir = self.task_dir, None
+        return task_dir
+
+    def stop(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+def load_ledger(ledger_path):
+    """读取进度台账中已成功的任务目录"""
+    finished = set()
+    if not os.path.exists(ledger_path):
+        return finished
+    with open(ledger_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "succeed":
+                finished.add(record["task_dir"])
+    return finished
+
+
+def backfill(task_dirs, workers=None, timeout=None, ledger_path=None):
+    """
+    多进程批量重跑历史报告，进度逐条写入台账，中断后重跑时跳过已成功的任务
+    :return: 汇总信息
+    """
+    workers = workers or BACKFILL_CONFIG["workers"]
+    timeout = BACKFILL_CONFIG["task_timeout"] if timeout is None else timeout
+    ledger_path = str(ledger_path or BACKFILL_CONFIG["ledger_path"])
+    os.makedirs(os.path.dirname(ledger_path), exist_ok=True)
+    finished = load_ledger(ledger_path)
+    pending = [task_dir for task_dir in task_dirs if task_dir not in finished]
+    summary = {"total": len(task_dirs), "skipped": len(task_dirs) - len(pending), "succeed": 0, "failed": 0,
+               "timeout": 0}
+    print(f"backfill: {len(pending)} pending, {summary['skipped']} already done")
+    kill_grace = BACKFILL_CONFIG.get("kill_grace", 60)
+    deadline_seconds = timeout + kill_grace if timeout else None
+    start_time = time.time()
+    # 常驻工作进程逐个领取任务，进程内的大模型客户端、缓存及数据库连接池跨任务复用；
+    # 任务超时由父进程按截止时间判断，仅终止并替换卡住的工作进程
+    queue = list(pending)
+    pool = [_BackfillWorker(timeout) for _ in range(min(workers, len(pending)))]
+    index = 0
+    with open(ledger_path, "a", encoding="utf-8") as ledger:
+        try:
+            while queue or any(worker.task_dir for worker in pool):
+                for worker in pool:
+                    if worker.task_dir is None and queue:
+                        worker.assign(queue.pop(0), deadline_seconds)
+                busy = [worker for worker in pool if worker.task_dir]
+                wait([worker.conn for worker in busy] + [worker.process.sentinel for worker in busy], timeout=1)
+                for slot, worker in enumerate(pool):
+                    if worker.task_dir is None:
+                        continue
+                    record, broken = None, False
+                    if worker.conn.poll():
+                        try:
+                            record = worker.conn.recv()
+                        except EOFError:
+                            broken = True
+                    if record is None:
+                        if not broken and worker.process.is_alive():
+                            if worker.deadline is None or time.time() < worker.deadline:
+                                continue
+                            status, error = "timeout", f"超过{timeout}秒未完成，已强制终止"
+                        else:
+                            # 工作进程异常退出
+                            status, error = "failed", f"工作进程异常退出，exitcode={worker.process.exitcode}"
+                        record = {"task_dir": worker.task_dir, "status": status, "error": error,
+                                  "elapsed": round(time.time() - worker.task_start, 3),
+                                  "finished_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+                        worker.kill()
+                        worker.release()
+                        # 仍有待执行任务时替换为新的工作进程
+                        if queue:
+                            pool[slot] = _BackfillWorker(timeout)
+                    else:
+                        worker.release()
+                    index += 1
+                    summary[record["status"]] += 1
+                    ledger.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    ledger.flush()
+                    print(f"[{index}/{len(pending)}] {record['status']} {record['elapsed']}s {record['task_dir']}")
+        finally:
+            for worker in pool:
+                if worker.task_dir:
+                    worker.kill()
+                worker.stop()
+    elapsed = time.time() - start_time
+    summary["elapsed"] = round(elapsed, 3)
+    summary["reports_per_hour"] = round(summary["succeed"] / elapsed * 3600, 2) if elapsed else 0
+    print(f"backfill summary: {json.dumps(summary, ensure_ascii=False)}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="离线报告生成")
+    parser.add_argument("source_path", nargs="?", default=None, help="单个任务目录")
+    parser.add_argument("--backfill", action="store_true", help="批量重跑files目录下的历史城投债报告")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数")
+    parser.add_argument("--timeout", type=int, default=None, help="单个任务超时时间（秒），0为不限制")
+    parser.add_argument("--ledger", default=None, help="进度台账路径")
+    parser.add_argument("--limit", type=int, default=None, help="最多重跑的任务数")
+    args = parser.parse_args()
+    if args.backfill:
+        task_dirs = get_ctz_file_lists() or []
+        backfill(task_dirs[:args.limit], workers=args.workers, timeout=args.timeout, ledger_path=args.ledger)
+    else:
+        # 城投债
+        run(args.source_path or "/home/datagov/INSTANCE/projects/report_xyzdc/files/test1") # 都江堰兴市集团有限责任公司
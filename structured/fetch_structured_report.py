@@ -11,6 +11,7 @@ from utils.data_util import parse_json_response
 from utils.llm_client2 import LLMClient
 from typing import Any, Dict, List
 from decimal import Decimal
+from copy import deepcopy
 from sqlmodel import Session
 from utils.db_util import engine
 from structured.services.get_comp_code_service import get_company_code
@@ -18,43 +19,143 @@ from structured.services.get_comp_info_service import get_company_info
 from structured.services.get_shareholder_service import get_latest_shareholders
 from structured.services.get_platform_scores_service import get_platform_score_by_company_code
 from structured.services.get_platspreadstat_service import get_plat_spreads
-from structured.services.get_creditrtissue_service import get_credit_ratings, get_latest_credit_rating
+from structured.services.get_creditrtissue_service import get_credit_ratings, get_latest_credit_rating, get_latest_credit_ratings
 from structured.services.get_bond_info_service import get_bond_info
 from structured.services.get_bond_registration_service import get_bond_registration_analysis
 from structured.services.get_guaranteedetails_service import get_guarantors
 from structured.services.get_economic_indicators_service import (
     get_latest_prgindicdata,
     get_latest_prgbalsheetnew,
+    get_latest_prgindicdatas,
+    get_latest_prgbalsheetnews,
     get_latest_regifin,
     get_latest_regifin_by_company
 )
-from structured.services.get_regifinaplat_service import get_regifinaplat_by_itcode, get_same_affiliation_platforms
+from structured.services.get_regifinaplat_service import (
+    get_regifinaplat_by_itcode,
+    get_regifinaplats_by_itcodes,
+    get_same_affiliation_platforms
+)
 
 logger = get_logger()
 
 class YJTCompanyDataFetcher:
-    """预警通数据解析"""
+    """预警通数据解析，同一实例内共用一个数据库会话，各查询结果按参数缓存，每个不同查询只执行一次"""
     def __init__(self, company_name: str = None, llm: LLMClient | None = None) -> None:
         self.llm = llm or LLMClient(LLM_CONFIG["llm"])
         self.company_name = company_name.strip() if company_name else ""
+        self._session: Session | None = None
+        self._cache: Dict[tuple, Any] = {}
         self.company_code, self.unified_credit_code = self._get_company_code() # 公司代码、社会信用代码
         self.guarantors = self._get_guarantors() # 担保人信息
         self.credit_ratings = self._get_all_credit_ratings() # 主体所有信用评级信息
         self.bonds_info = self._get_bonds_info() # 主体债券信息
+        self._prefetch()
+
+    @property
+    def session(self) -> Session:
+        """实例内共用的数据库会话"""
+        if self._session is None:
+            self._session = Session(engine)
+        return self._session
+
+    def close(self) -> None:
+        """关闭数据库会话"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _cached(self, key: tuple, loader):
+        """
+        按key缓存查询结果（含查询异常），同一查询只执行一次，返回副本避免调用方修改缓存；
+        查询失败时回滚会话以保证后续查询可用
+        :param loader: 以会话为参数的查询函数，返回可序列化数据
+        """
+        if key not in self._cache:
+            try:
+                self._cache[key] = (loader(self.session), None)
+            except Exception as e:
+                self.session.rollback()
+                self._cache[key] = (None, e)
+        value, error = self._cache[key]
+        if error is not None:
+            raise error
+        return deepcopy(value)
+
+    def _prefetch(self) -> None:
+        """一轮批量查询预取主体及担保人的融资平台、最新评级、资产负债表及资产负债率"""
+        codes = [self.company_code] + [guarantor.get("GUARCODE") for guarantor in self.guarantors]
+        logger.info(f"批量预取【{self.company_name}】及担保人数据")
+        self._bulk_prefetch(codes, ("regifinaplat", "latest_credit_rating", "latest_balance_sheet", "latest_indicdata"))
+
+    def _bulk_prefetch(self, codes: List[str], datasets: tuple) -> None:
+        """
+        对尚未缓存的公司代码，每类数据用一次批量查询取回并写入缓存；失败时保持按需查询
+        :param datasets: 需预取的数据类别，取值 regifinaplat/latest_credit_rating/latest_balance_sheet/latest_indicdata
+        """
+        loaders = {
+            "regifinaplat": lambda pending: {
+                code: self._platform_to_dict(platform)
+                for code, platform in get_regifinaplats_by_itcodes(pending, self.session).items()},
+            "latest_credit_rating": lambda pending: {
+                code: rating.model_dump(mode='json')
+                for code, rating in get_latest_credit_ratings(pending, self.session).items()},
+            "latest_balance_sheet": lambda pending: {
+                code: [result.model_dump(mode='json') for result in results]
+                for code, results in get_latest_prgbalsheetnews(pending, self.session).items()},
+            "latest_indicdata": lambda pending: {
+                code: [result.model_dump(mode='json') for result in results]
+                for code, results in get_latest_prgindicdatas(pending, self.session).items()},
+        }
+        # 未查到数据时的缓存值，与逐条查询的返回一致
+        empty_values = {"regifinaplat": None, "latest_credit_rating": None,
+                        "latest_balance_sheet": [], "latest_indicdata": []}
+        codes = list(dict.fromkeys(code for code in codes if code))
+        for dataset in datasets:
+            pending = [code for code in codes if (dataset, code) not in self._cache]
+            if not pending:
+                continue
+            try:
+                values = loaders[dataset](pending)
+            except Exception as e:
+                self.session.rollback()
+                logger.error(f"批量预取{dataset}失败，改为按需查询: {e}")
+                continue
+            for code in pending:
+                self._cache[(dataset, code)] = (values.get(code, empty_values[dataset]), None)
+
+    @staticmethod
+    def _platform_to_dict(platform) -> Dict[str, Any]:
+        return {
+            "itcode": platform.ITCODE,
+            "itname": platform.ITNAME,
+            "finaffcode": platform.FINAFFCODE,
+            "finaffname": platform.FINAFFNAME,
+            "territorytype": platform.TERRITORYTYPE,
+            "bondbalance": platform.BONDBALANCE,
+            "reglanname_p": platform.REGLANNAME_P,
+            "reglanname_c": platform.REGLANNAME_C
+        }
 
     def _get_company_code(self) -> tuple[str, str]:
         """获取公司代码和统一社会信用代码"""
         try:
             logger.info(f"获取公司【{self.company_name}】代码信息")
-            with Session(engine) as session:
-                from structured.services.get_comp_info_service import get_compcode_by_name
-                comcode = get_compcode_by_name(self.company_name, session)
-                logger.info(f"从机构资料表获取到代码: {comcode}")
-                # 查询统一社会信用代码
-                response = get_company_code(self.company_name, session)
-                outcode = response.OUTCODE or ""
-                logger.info(f"公司代码: {comcode}, 统一社会信用代码: {outcode or '无'}")
-                return comcode, outcode
+            from structured.services.get_comp_info_service import get_compcode_by_name
+            comcode = self._cached(("compcode", self.company_name),
+                                   lambda session: get_compcode_by_name(self.company_name, session))
+            logger.info(f"从机构资料表获取到代码: {comcode}")
+            # 查询统一社会信用代码
+            outcode = self._cached(("outcode", self.company_name),
+                                   lambda session: get_company_code(self.company_name, session).OUTCODE or "")
+            logger.info(f"公司代码: {comcode}, 统一社会信用代码: {outcode or '无'}")
+            return comcode, outcode
         except Exception as e:
             logger.error(f"获取公司代码失败: {e}")
             raise
@@ -63,9 +164,9 @@ class YJTCompanyDataFetcher:
         """获取担保人信息"""
         try:
             logger.info(f"获取【{self.company_name}】担保人信息")
-            with Session(engine) as session:
-                guarantors = get_guarantors(company_code or self.company_code, session)
-                return [guarantor.model_dump(mode='json') for guarantor in guarantors] if guarantors else []
+            company_code = company_code or self.company_code
+            return self._cached(("guarantors", company_code), lambda session: [
+                guarantor.model_dump(mode='json') for guarantor in get_guarantors(company_code, session) or []])
         except Exception as e:
             logger.error(f"获取担保人信息失败: {e}")
             return []
@@ -74,9 +175,9 @@ class YJTCompanyDataFetcher:
         """获取公司信用评级信息列表"""
         try:
             logger.info(f"获取【{self.company_name}】所有信用评级信息")
-            with Session(engine) as session:
-                ratings = get_credit_ratings(company_code or self.company_code, session)
-                return [rating.model_dump(mode='json') for rating in ratings] if ratings else []
+            company_code = company_code or self.company_code
+            return self._cached(("credit_ratings", company_code), lambda session: [
+                rating.model_dump(mode='json') for rating in get_credit_ratings(company_code, session) or []])
         except Exception as e:
             logger.error(f"获取公司所有信用评级信息失败: {e}")
             return []
@@ -85,9 +186,13 @@ class YJTCompanyDataFetcher:
         """获取公司最新信用评级信息（单条记录）"""
         try:
             logger.info(f"获取【{self.company_name}】最新信用评级")
-            with Session(engine) as session:
-                rating = get_latest_credit_rating(company_code or self.company_code, session)
+            company_code = company_code or self.company_code
+
+            def _load(session):
+                rating = get_latest_credit_rating(company_code, session)
                 return rating.model_dump(mode='json') if rating else None
+
+            return self._cached(("latest_credit_rating", company_code), _load)
         except Exception as e:
             logger.error(f"获取公司最新信用评级信息失败: {e}")
             return None
@@ -96,9 +201,9 @@ class YJTCompanyDataFetcher:
         """获取公司所有债券详细信息"""
         try:
             logger.info(f"获取【{self.company_name}】债券详细信息")
-            with Session(engine) as session:
-                bond_info = get_bond_info(company_code or self.company_code, session)
-                return bond_info.model_dump(mode='json')
+            company_code = company_code or self.company_code
+            return self._cached(("bonds_info", company_code),
+                                lambda session: get_bond_info(company_code, session).model_dump(mode='json'))
         except Exception as e:
             logger.error(f"获取债券详细信息失败: {e}")
             return {}
@@ -201,20 +306,13 @@ class YJTCompanyDataFetcher:
         """获取当前公司的地方融资平台信息"""
         try:
             logger.info(f"获取【{self.company_name}】融资平台信息")
-            with Session(engine) as session:
-                platform = get_regifinaplat_by_itcode(company_code or self.company_code, session)
-                if platform:
-                    return {
-                        "itcode": platform.ITCODE,
-                        "itname": platform.ITNAME,
-                        "finaffcode": platform.FINAFFCODE,
-                        "finaffname": platform.FINAFFNAME,
-                        "territorytype": platform.TERRITORYTYPE,
-                        "bondbalance": platform.BONDBALANCE,
-                        "reglanname_p": platform.REGLANNAME_P,
-                        "reglanname_c": platform.REGLANNAME_C
-                    }
-                return None
+            company_code = company_code or self.company_code
+
+            def _load(session):
+                platform = get_regifinaplat_by_itcode(company_code, session)
+                return self._platform_to_dict(platform) if platform else None
+
+            return self._cached(("regifinaplat", company_code), _load)
         except Exception as e:
             logger.error(f"获取融资平台信息失败: {e}")
             return None
@@ -817,28 +915,26 @@ class YJTCompanyDataFetcher:
         获取与当前公司同一融资归属地的所有平台信息
         """
         try:
-            with Session(engine) as session:
-                platforms = get_same_affiliation_platforms(self.company_code, session)
-                if not platforms:
-                    logger.warning(f"未找到公司 {self.company_name} 同一归属地的平台信息")
-                    return []
-
+            def _load(session):
                 # 转换为字典列表
-                result = []
-                for platform in platforms:
-                    result.append({
-                        "ITCODE": platform.ITCODE,
-                        "ITNAME": platform.ITNAME,
-                        "FINAFFCODE": platform.FINAFFCODE,
-                        "FINAFFNAME": platform.FINAFFNAME,
-                        "TERRITORYTYPE": platform.TERRITORYTYPE,
-                        "REGLANNAME_P": platform.REGLANNAME_P,
-                        "REGLANNAME_C": platform.REGLANNAME_C,
-                        "BONDBALANCE": platform.BONDBALANCE
-                    })
-
-                logger.info(f"查询到 {len(result)} 个同一归属地的平台")
-                return result
+                return [{
+                    "ITCODE": platform.ITCODE,
+                    "ITNAME": platform.ITNAME,
+                    "FINAFFCODE": platform.FINAFFCODE,
+                    "FINAFFNAME": platform.FINAFFNAME,
+                    "TERRITORYTYPE": platform.TERRITORYTYPE,
+                    "REGLANNAME_P": platform.REGLANNAME_P,
+                    "REGLANNAME_C": platform.REGLANNAME_C,
+                    "BONDBALANCE": platform.BONDBALANCE
+                } for platform in get_same_affiliation_platforms(self.company_code, session) or []]
+
+            result = self._cached(("same_affiliation_platforms", self.company_code), _load)
+            if not result:
+                logger.warning(f"未找到公司 {self.company_name} 同一归属地的平台信息")
+                return []
+
+            logger.info(f"查询到 {len(result)} 个同一归属地的平台")
+            return result
 
         except Exception as e:
             logger.error(f"获取同一归属地平台信息失败: {str(e)}")
@@ -949,6 +1045,10 @@ class YJTCompanyDataFetcher:
                     "符合/不符合": "不符合"
                 }
 
+            # 两次批量查询取回区域内全部平台的最新评级及资产负债表，以下排名在内存中计算
+            self._bulk_prefetch([p.get("ITCODE", "") for p in region_platforms],
+                                ("latest_credit_rating", "latest_balance_sheet"))
+
             # 统计AA及以上评级平台的净资产
             net_assets = []
 
@@ -1172,11 +1272,10 @@ class YJTCompanyDataFetcher:
         try:
             logger.info(f"获取【{self.company_name}】公司基本信息")
 
-            with Session(engine) as session:
-                company_info = get_company_info(self.company_code, session)
-                result = company_info.model_dump(mode='json')
-                result['unified_credit_code'] = self.unified_credit_code
-                return result
+            result = self._cached(("company_info", self.company_code),
+                                  lambda session: get_company_info(self.company_code, session).model_dump(mode='json'))
+            result['unified_credit_code'] = self.unified_credit_code
+            return result
         except Exception as e:
             logger.error(f"获取公司信息失败: {e}")
             return {}
@@ -1186,9 +1285,9 @@ class YJTCompanyDataFetcher:
         try:
             logger.info(f"获取【{self.company_name}】区域排名信息")
 
-            with Session(engine) as session:
-                scores = get_platform_score_by_company_code(company_code or self.company_code, session)
-                return [score.model_dump(mode='json') for score in scores] if scores else []
+            company_code = company_code or self.company_code
+            return self._cached(("platform_scores", company_code), lambda session: [
+                score.model_dump(mode='json') for score in get_platform_score_by_company_code(company_code, session) or []])
         except Exception as e:
             logger.error(f"获取区域排名信息失败: {e}")
             return []
@@ -1198,9 +1297,9 @@ class YJTCompanyDataFetcher:
         try:
             logger.info(f"获取【{self.company_name}】股东信息")
 
-            with Session(engine) as session:
-                shareholders = get_latest_shareholders(company_code or self.company_code, session)
-                return [shareholder.model_dump(mode='json') for shareholder in shareholders] if shareholders else []
+            company_code = company_code or self.company_code
+            return self._cached(("shareholders", company_code), lambda session: [
+                shareholder.model_dump(mode='json') for shareholder in get_latest_shareholders(company_code, session) or []])
         except Exception as e:
             logger.error(f"获取股东信息失败: {e}")
             return []
@@ -1210,9 +1309,9 @@ class YJTCompanyDataFetcher:
         try:
             logger.info(f"获取【{self.company_name}】利差信息")
 
-            with Session(engine) as session:
-                spreads = get_plat_spreads(company_code or self.company_code, session)
-                return [spread.model_dump(mode='json') for spread in spreads] if spreads else []
+            company_code = company_code or self.company_code
+            return self._cached(("bond_spreads", company_code), lambda session: [
+                spread.model_dump(mode='json') for spread in get_plat_spreads(company_code, session) or []])
         except Exception as e:
             logger.error(f"获取利差信息失败: {e}")
             return []
@@ -1222,9 +1321,10 @@ class YJTCompanyDataFetcher:
         try:
             logger.info(f"获取【{company_name or self.company_name}】债券注册批复信息")
 
-            with Session(engine) as session:
-                registrations = get_bond_registration_analysis(company_name or self.company_name, session)
-                return registrations if registrations else []
+            company_name = company_name or self.company_name
+            registrations = self._cached(("bond_registration", company_name),
+                                         lambda session: get_bond_registration_analysis(company_name, session))
+            return registrations if registrations else []
         except Exception as e:
             logger.error(f"获取债券注册批复信息失败: {e}")
             return []
@@ -1233,15 +1333,16 @@ class YJTCompanyDataFetcher:
         """获取一般公共预算收入经济数据"""
         logger.info(f"获取【{self.company_name}】一般公共预算收入经济数据")
         try:
-            with Session(engine) as session:
+            def _load(session):
                 # 如果提供了regioncode，使用get_latest_regifin
                 if regioncode is not None:
                     results = get_latest_regifin(regioncode, session)
                 else:
                     # 否则使用公司代码查询
                     results = get_latest_regifin_by_company(self.company_code, session)
-
                 return [result.model_dump(mode='json') for result in results] if results else []
+
+            return self._cached(("general_budget_income", regioncode, self.company_code), _load)
         except Exception as e:
             logger.error(f"获取一般公共预算收入经济数据失败: {e}")
             return []
@@ -1250,9 +1351,9 @@ class YJTCompanyDataFetcher:
         """获取最新一般企业资产负债表数据"""
         logger.info(f"获取【{self.company_name}】最新一般企业资产负债表数据")
         try:
-            with Session(engine) as session:
-                results = get_latest_prgbalsheetnew(company_code or self.company_code, session)
-                return [result.model_dump(mode='json') for result in results] if results else []
+            company_code = company_code or self.company_code
+            return self._cached(("latest_balance_sheet", company_code), lambda session: [
+                result.model_dump(mode='json') for result in get_latest_prgbalsheetnew(company_code, session)])
         except Exception as e:
             logger.error(f"获取最新一般企业资产负债表数据失败: {e}")
             return []
@@ -1261,9 +1362,9 @@ class YJTCompanyDataFetcher:
         """获取最新资产负债率"""
         logger.info(f"获取【{self.company_name}】最新资产负债率")
         try:
-            with Session(engine) as session:
-                results = get_latest_prgindicdata(company_code or self.company_code, session)
-                return [result.model_dump(mode='json') for result in results] if results else []
+            company_code = company_code or self.company_code
+            return self._cached(("latest_indicdata", company_code), lambda session: [
+                result.model_dump(mode='json') for result in get_latest_prgindicdata(company_code, session)])
         except Exception as e:
             logger.error(f"获取最新资产负债率失败: {e}")
             return []
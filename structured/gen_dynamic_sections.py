@@ -23,8 +23,11 @@ class ComprehensiveReportGenerator:
         self.company_name = company_name
         self.fetcher = YJTCompanyDataFetcher(company_name=company_name)
         logger.info(f"正在获取【{company_name}】的所有结构化数据...")
-        # 一次性获取所有数据
-        self.data = self.fetcher.get_report_data()
+        # 一次性获取所有数据，完成后释放数据库会话
+        try:
+            self.data = self.fetcher.get_report_data()
+        finally:
+            self.fetcher.close()
 
     # ==========================
     # 通用工具方法
@@ -7,10 +7,10 @@ import sys
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 from sqlmodel import Session, select, desc
-from typing import List
+from typing import Dict, Iterable, List
 from structured.models.tq_bd_creditrtissue_model import TQ_BD_CREDITRTISSUE
 from utils.logger_util import get_logger
-from utils.db_util import engine
+from utils.db_util import engine, select_latest_per_group
 
 logger = get_logger()
 
@@ -73,6 +73,29 @@ def get_latest_credit_rating(comp_code: str, session: Session) -> TQ_BD_CREDITRT
         logger.error(f"查询最新信用评级信息失败: {e}")
         raise
 
+def get_latest_credit_ratings(comp_codes: Iterable[str], session: Session) -> Dict[str, TQ_BD_CREDITRTISSUE]:
+    """
+    批量查询多个公司的最新信用评级信息（基于PUBLISHDATE），一次查询返回全部结果。
+
+    :param comp_codes: 公司代码列表
+    :param session: 数据库会话
+    :return: {公司代码: 最新信用评级信息}，无评级的公司不在结果中
+    """
+    comp_codes = list(dict.fromkeys(code for code in comp_codes if code))
+    if not comp_codes:
+        return {}
+    try:
+        logger.info(f"批量查询 {len(comp_codes)} 个公司的最新信用评级信息")
+        results = session.exec(
+            select_latest_per_group(TQ_BD_CREDITRTISSUE, TQ_BD_CREDITRTISSUE.COMPCODE,
+                                    TQ_BD_CREDITRTISSUE.PUBLISHDATE, comp_codes)
+        ).all()
+        logger.info(f"查询到 {len(results)} 条最新信用评级信息")
+        return {result.COMPCODE: TQ_BD_CREDITRTISSUE(**result.model_dump()) for result in results}
+    except Exception as e:
+        logger.error(f"批量查询最新信用评级信息失败: {e}")
+        raise
+
 if __name__ == "__main__":
     test_comp_code = "81572830"
     with Session(engine) as session:
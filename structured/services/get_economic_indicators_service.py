@@ -9,12 +9,12 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from sqlmodel import Session, select
-from typing import List
+from typing import Dict, Iterable, List
 from structured.models.tq_fin_prgindicdata_model import TQ_FIN_PRGINDICDATA
 from structured.models.tq_fin_prgbalsheetnew_model import TQ_FIN_PRGBALSHEETNEW
 from structured.models.tq_cibd_regifin_new_model import TQ_CIBD_REGIFIN_NEW
 from structured.models.tq_cibd_regifinaplat_model import TQ_CIBD_REGIFINAPLAT
-from utils.db_util import engine
+from utils.db_util import engine, select_latest_per_group
 from utils.logger_util import get_logger
 
 logger = get_logger()
@@ -74,6 +74,60 @@ def get_latest_prgbalsheetnew(compcode: str, session: Session) -> List[TQ_FIN_PR
         raise
 
 
+def get_latest_prgindicdatas(compcodes: Iterable[str], session: Session) -> Dict[str, List[TQ_FIN_PRGINDICDATA]]:
+    """
+    批量查询多个公司的最新资产负债率
+
+    :param compcodes: 公司内码列表
+    :param session: 数据库会话
+    :return: {公司内码: 最新资产负债率数据列表}，无数据的公司返回空列表
+    """
+    compcodes = list(dict.fromkeys(code for code in compcodes if code))
+    if not compcodes:
+        return {}
+    try:
+        logger.info(f"批量查询 {len(compcodes)} 个公司的最新资产负债率")
+        results = session.exec(
+            select_latest_per_group(TQ_FIN_PRGINDICDATA, TQ_FIN_PRGINDICDATA.COMPCODE, TQ_FIN_PRGINDICDATA.ENDDATE,
+                                    compcodes, TQ_FIN_PRGINDICDATA.REPORTTYPE == "3")
+        ).all()
+        latest = {compcode: [] for compcode in compcodes}
+        for result in results:
+            latest[result.COMPCODE] = [result]
+        logger.info(f"查询成功，返回 {len(results)} 条记录")
+        return latest
+    except Exception as e:
+        logger.error(f"批量查询最新资产负债率时出错: {e}")
+        raise
+
+
+def get_latest_prgbalsheetnews(compcodes: Iterable[str], session: Session) -> Dict[str, List[TQ_FIN_PRGBALSHEETNEW]]:
+    """
+    批量查询多个公司的最新一般企业资产负债表数据
+
+    :param compcodes: 公司内码列表
+    :param session: 数据库会话
+    :return: {公司内码: 最新资产负债表数据列表}，无数据的公司返回空列表
+    """
+    compcodes = list(dict.fromkeys(code for code in compcodes if code))
+    if not compcodes:
+        return {}
+    try:
+        logger.info(f"批量查询 {len(compcodes)} 个公司的最新一般企业资产负债表数据")
+        results = session.exec(
+            select_latest_per_group(TQ_FIN_PRGBALSHEETNEW, TQ_FIN_PRGBALSHEETNEW.COMPCODE,
+                                    TQ_FIN_PRGBALSHEETNEW.ENDDATE, compcodes, TQ_FIN_PRGBALSHEETNEW.REPORTTYPE == "1")
+        ).all()
+        latest = {compcode: [] for compcode in compcodes}
+        for result in results:
+            latest[result.COMPCODE] = [result]
+        logger.info(f"查询成功，返回 {len(results)} 条记录")
+        return latest
+    except Exception as e:
+        logger.error(f"批量查询最新一般企业资产负债表数据时出错: {e}")
+        raise
+
+
 def get_latest_regifin(regioncode: int, session: Session) -> List[TQ_CIBD_REGIFIN_NEW]:
     """
     根据地区编码查询一般公共预算收入经济数据
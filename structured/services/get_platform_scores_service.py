@@ -6,17 +6,25 @@ from pathlib import Path
 import sys
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
-from sqlmodel import Session, select, desc
+import threading
+import time
+from collections import OrderedDict
+from sqlmodel import Session, select
 from typing import List
 from pydantic import BaseModel, Field
 from structured.models.tq_cibd_regifinaplat_model import TQ_CIBD_REGIFINAPLAT
 from structured.models.tq_cibd_platscore_model import TQ_CIBD_PLATSCORE
-from structured.models.tq_bd_creditrtissue_model import TQ_BD_CREDITRTISSUE
+from structured.services.get_creditrtissue_service import get_latest_credit_ratings
+from config.config import PLATFORM_SCORE_CACHE_CONFIG
 from utils.logger_util import get_logger
-from utils.db_util import engine
+from utils.db_util import engine, select_latest_per_group
 
 logger = get_logger()
 
+# 区域代码 -> (写入时间, 区域排名信息)
+_region_cache = OrderedDict()
+_region_cache_lock = threading.Lock()
+
 class PlatformScoreResponse(BaseModel):
     """响应模型"""
     itname: str | None = Field(None, description="公司名称")
@@ -26,9 +34,40 @@ class PlatformScoreResponse(BaseModel):
     rank: str | None = Field(None, description="省内排名，格式为 '排名/总数'")
     credit_rate: str | None = Field(None, description="最新信用评级")
 
+def _get_cached_region(region_code: str) -> List[PlatformScoreResponse] | None:
+    """读取区域缓存，未启用、未命中或已过期时返回None"""
+    if not PLATFORM_SCORE_CACHE_CONFIG.get("enabled", False):
+        return None
+    with _region_cache_lock:
+        entry = _region_cache.get(region_code)
+        if entry is None:
+            return None
+        cached_at, results = entry
+        if time.time() - cached_at > PLATFORM_SCORE_CACHE_CONFIG.get("ttl", 0):
+            del _region_cache[region_code]
+            return None
+    return [result.model_copy() for result in results]
+
+
+def _set_cached_region(region_code: str, results: List[PlatformScoreResponse]):
+    if not PLATFORM_SCORE_CACHE_CONFIG.get("enabled", False):
+        return
+    with _region_cache_lock:
+        _region_cache[region_code] = (time.time(), [result.model_copy() for result in results])
+        _region_cache.move_to_end(region_code)
+        while len(_region_cache) > PLATFORM_SCORE_CACHE_CONFIG.get("max_entries", 512):
+            _region_cache.popitem(last=False)
+
+
+def clear_platform_score_cache():
+    """清空区域排名缓存"""
+    with _region_cache_lock:
+        _region_cache.clear()
+
 def get_platform_score_by_company_code(company_code: str, session: Session) -> List[PlatformScoreResponse]:
     """
     根据公司代码查询同一区域内所有城投企业的评分及其关联的地方融资平台数据，并计算省内排名（基于SCORE_ALL降序），添加最新信用评级信息。
+    区域内评分及评级批量查询，结果按区域代码（FINAFFCODE）缓存在进程内，见 PLATFORM_SCORE_CACHE_CONFIG。
 
     :param company_code: 公司代码
     :param session: 数据库会话
@@ -48,6 +87,11 @@ def get_platform_score_by_company_code(company_code: str, session: Session) -> L
             logger.error(f"未找到公司代码 '{company_code}' 的融资归属地或省份信息")
             raise Exception(f"公司代码 '{company_code}' 无融资平台信息")
 
+        cached_results = _get_cached_region(company_platform.FINAFFCODE)
+        if cached_results is not None:
+            logger.info(f"区域 '{company_platform.FINAFFCODE}' 命中缓存，共 {len(cached_results)} 条区域排名信息")
+            return cached_results
+
         # 查询同一区域内所有公司融资平台数据
         region_platforms = session.exec(
             select(TQ_CIBD_REGIFINAPLAT)
@@ -58,11 +102,12 @@ def get_platform_score_by_company_code(company_code: str, session: Session) -> L
             logger.error(f"未找到公司代码 '{company_code}' 的区域内融资平台数据")
             raise Exception(f"未找到区域内融资平台数据")
 
-        # 获取同一省份所有公司的评分
+        # 获取同一省份所有公司的最新评分（与展示评分一致，每个公司取ENTRYDATE最新的一条）
         prov_scores = session.exec(
-            select(TQ_CIBD_PLATSCORE.ITCODE, TQ_CIBD_PLATSCORE.SCORE_ALL)
-            .join(TQ_CIBD_REGIFINAPLAT, TQ_CIBD_PLATSCORE.ITCODE == TQ_CIBD_REGIFINAPLAT.ITCODE)
-            .where(TQ_CIBD_REGIFINAPLAT.REGLANCODE_P == company_platform.REGLANCODE_P)
+            select_latest_per_group(TQ_CIBD_PLATSCORE, TQ_CIBD_PLATSCORE.ITCODE, TQ_CIBD_PLATSCORE.ENTRYDATE, None,
+                                    TQ_CIBD_PLATSCORE.ITCODE.in_(
+                                        select(TQ_CIBD_REGIFINAPLAT.ITCODE)
+                                        .where(TQ_CIBD_REGIFINAPLAT.REGLANCODE_P == company_platform.REGLANCODE_P)))
         ).all()
 
         # 按 SCORE_ALL 降序排序，处理 None 值
@@ -72,27 +117,28 @@ def get_platform_score_by_company_code(company_code: str, session: Session) -> L
         rank_dict = {}
         current_rank = 1
         prev_score = None
-        for idx, (itcode, score_all) in enumerate(sorted_prov_scores):
+        for idx, score in enumerate(sorted_prov_scores):
+            itcode, score_all = score.ITCODE, score.SCORE_ALL
             if score_all != prev_score:
                 current_rank = idx + 1
             rank_dict[itcode] = current_rank
             prev_score = score_all
 
+        # 批量查询区域内平台的最新评分及最新信用评级（ROW_NUMBER窗口，各一次查询）
+        itcodes = [platform.ITCODE for platform in region_platforms if platform.ITCODE]
+        scores = {
+            score.ITCODE: score for score in session.exec(
+                select_latest_per_group(TQ_CIBD_PLATSCORE, TQ_CIBD_PLATSCORE.ITCODE,
+                                        TQ_CIBD_PLATSCORE.ENTRYDATE, itcodes)
+            ).all()
+        } if itcodes else {}
+        latest_ratings = get_latest_credit_ratings(itcodes, session)
+
         # 构建响应
         formatted_results = []
         for platform in region_platforms:
-            # 查询关联评分数据
-            score = session.exec(
-                select(TQ_CIBD_PLATSCORE)
-                .where(TQ_CIBD_PLATSCORE.ITCODE == platform.ITCODE)
-            ).first()
-
-            # 查询最新信用评级
-            latest_rating = session.exec(
-                select(TQ_BD_CREDITRTISSUE)
-                .where(TQ_BD_CREDITRTISSUE.COMPCODE == platform.ITCODE)
-                .order_by(desc(TQ_BD_CREDITRTISSUE.PUBLISHDATE))
-            ).first()
+            score = scores.get(platform.ITCODE)
+            latest_rating = latest_ratings.get(platform.ITCODE)
 
             # 获取排名
             int_rank = rank_dict.get(platform.ITCODE)
@@ -115,6 +161,7 @@ def get_platform_score_by_company_code(company_code: str, session: Session) -> L
         formatted_results.sort(key=lambda x: int(x.rank.split('/')[0]) if x.rank else float('inf'))
 
         logger.info(f"查询到 {len(formatted_results)} 条区域排名信息")
+        _set_cached_region(company_platform.FINAFFCODE, formatted_results)
         return formatted_results
 
     except Exception as e:
@@ -9,7 +9,7 @@ import sys
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 from sqlmodel import Session, select
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from structured.models.tq_cibd_regifinaplat_model import TQ_CIBD_REGIFINAPLAT
 from utils.db_util import engine
 from utils.logger_util import get_logger
@@ -36,6 +36,30 @@ def get_regifinaplat_by_itcode(itcode: str, session: Session) -> Optional[TQ_CIB
         logger.error(f"查询地方融资平台信息时出错: {e}")
         return None
 
+def get_regifinaplats_by_itcodes(itcodes: Iterable[str], session: Session) -> Dict[str, TQ_CIBD_REGIFINAPLAT]:
+    """
+    根据多个公司代码批量查询地方融资平台信息
+    :return: {公司代码: 融资平台信息}，非融资平台的公司不在结果中
+    """
+    itcodes = list(dict.fromkeys(code for code in itcodes if code))
+    if not itcodes:
+        return {}
+    try:
+        logger.info(f"批量查询 {len(itcodes)} 个公司的地方融资平台信息")
+        results = session.exec(
+            select(TQ_CIBD_REGIFINAPLAT)
+            .where(TQ_CIBD_REGIFINAPLAT.ITCODE.in_(itcodes))
+            .distinct()
+        ).all()
+        platforms = {}
+        for result in results:
+            platforms.setdefault(result.ITCODE, result)
+        logger.info(f"查询到 {len(platforms)} 条融资平台信息")
+        return platforms
+    except Exception as e:
+        logger.error(f"批量查询地方融资平台信息时出错: {e}")
+        return {}
+
 def get_regifinaplat_by_finaffcode(finaffcode: str, session: Session) -> List[TQ_CIBD_REGIFINAPLAT]:
     """
     根据融资归属地代码查询地方融资平台信息
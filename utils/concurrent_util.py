@@ -0,0 +1,69 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config.config import CONCURRENCY_CONFIG
+
+
+def concurrent_map(func, items, max_workers=None):
+    """
+    有界并发执行func，返回结果与items顺序一致
+    :param func: 单个元素的处理函数
+    :param items: 待处理元素
+    :param max_workers: 最大并发数，默认取配置llm_max_workers
+    :return: 结果列表
+    """
+    items = list(items)
+    if max_workers is None:
+        max_workers = CONCURRENCY_CONFIG.get("llm_max_workers", 1)
+    max_workers = max(1, min(max_workers, len(items) or 1))
+    if max_workers == 1:
+        return [func(item) for item in items]
+    # 子线程继承调用方上下文（如任务追踪），每个元素使用独立副本
+    contexts = [contextvars.copy_context() for _ in items]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda context, item: context.run(func, item), contexts, items))
+
+
+def run_task_graph(tasks, max_workers=None):
+    """
+    按依赖关系有界并发执行任务，依赖任务完成后才提交后续任务
+    :param tasks: {任务名称: (无参函数, [依赖任务名称])}
+    :param max_workers: 最大并发数，默认取配置llm_max_workers
+    :return: {任务名称: 结果}
+    """
+    for name, (_, deps) in tasks.items():
+        for dep in deps:
+            if dep not in tasks:
+                raise ValueError(f"任务{name}依赖的任务{dep}不存在")
+    if max_workers is None:
+        max_workers = CONCURRENCY_CONFIG.get("llm_max_workers", 1)
+    max_workers = max(1, min(max_workers, len(tasks) or 1))
+    results = {}
+    pending = dict(tasks)
+    if max_workers == 1:
+        while pending:
+            ready = [name for name, (_, deps) in pending.items() if all(dep in results for dep in deps)]
+            if not ready:
+                raise ValueError(f"任务存在循环依赖：{list(pending)}")
+            for name in ready:
+                func, _ = pending.pop(name)
+                results[name] = func()
+        return results
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while pending or running:
+            for name in [name for name, (_, deps) in pending.items() if all(dep in results for dep in deps)]:
+                func, _ = pending.pop(name)
+                running[executor.submit(contextvars.copy_context().run, func)] = name
+            if not running:
+                raise ValueError(f"任务存在循环依赖：{list(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+    return results
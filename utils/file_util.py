@@ -1,5 +1,7 @@
 import os
 import subprocess
+import tempfile
+from pathlib import Path
 
 import shutil
 import pandas as pd
@@ -8,8 +10,7 @@ import re
 
 def mkdir(dir):
     """创建目录"""
-    if not os.path.exists(dir):
-        os.makedirs(dir)
+    os.makedirs(dir, exist_ok=True)
 
 
 def rmdir(dir):
@@ -42,8 +43,11 @@ def convert_file(input_path, output_format, output_dir=None):
     else:
         os.makedirs(output_dir, exist_ok=True)
 
+    # 每次转换使用独立的用户配置目录，多个任务并发转换时共用默认配置会导致soffice提前退出、未生成文件
+    profile_dir = tempfile.mkdtemp(prefix="lo_")
     command = [
         'libreoffice25.2',
+        f'-env:UserInstallation={Path(profile_dir).as_uri()}',
         '--headless',         # 无界面模式
         '--convert-to', output_format,
         '--outdir', output_dir,
@@ -58,6 +62,8 @@ def convert_file(input_path, output_format, output_dir=None):
         return output_path
     except subprocess.CalledProcessError as e:
         raise RuntimeError(f"转换失败: {e.stderr.decode()}") from e
+    finally:
+        shutil.rmtree(profile_dir, ignore_errors=True)
 
 
 def convert_doc_to_docx(doc_path, docx_path):
@@ -0,0 +1,105 @@
+import re
+
+import pandas as pd
+
+from utils.string_util import extract_date
+
+# 有息负债合计行
+DEBT_TOTAL_ROW_PATTERN = re.compile(r"^(合计|总计|有息(负债|债务)(合计|总计|总额)?)$")
+# 一年以内（短期）列
+SHORT_TERM_COL_PATTERN = re.compile(r"(1|一)年(以内|内)|短期")
+# 合计列
+TOTAL_COL_PATTERN = re.compile(r"合计|总计|总额")
+
+
+def table_to_frame(table_data, header_rows=1):
+    """
+    二维表格转为金额DataFrame：行索引为首列标签（去空白），列为数据列位置，金额解析千分位；
+    '-'视为0，空值视为NaN，数据全为空的行（如"流动资产"等分类标题行）剔除
+    :return: (DataFrame, 数据列表头)
+    """
+    header = [str(cell).strip() for cell in table_data[header_rows - 1]]
+    rows = [row for row in table_data[header_rows:] if len(row) == len(header)]
+    if len(header) < 2 or not rows:
+        return None, header[1:]
+    df = pd.DataFrame(rows).astype(str)
+    labels = df.iloc[:, 0].str.replace(r"\s", "", regex=True)
+    values = df.iloc[:, 1:].apply(
+        lambda col: pd.to_numeric(col.str.replace(r"[,\s]", "", regex=True).replace({"-": "0", "—": "0"}),
+                                  errors="coerce"))
+    values.index = labels
+    values.columns = range(values.shape[1])
+    values = values.dropna(how="all")
+    values = values[~values.index.duplicated()]
+    return values, header[1:]
+
+
+def latest_period_column(header):
+    """最新时间序列所在列，表头无法识别日期时取第一列"""
+    dates = [extract_date(cell) for cell in header]
+    if not any(dates):
+        return 0
+    latest_date = max(date for date in dates if date)
+    return dates.index(latest_date)
+
+
+def format_period(date):
+    """yyyymm 转为 'X年末' 或 'X年X月末'"""
+    if not date or len(date) != 6:
+        return ""
+    if date.endswith("12"):
+        return f"{date[:4]}年末"
+    return f"{date[:4]}年{int(date[4:])}月末"
+
+
+def extract_balance_sheet_items(table):
+    """
+    从资产负债表中直接提取其他应收款、存货、流动资产、资产总计及报告截至日期（取最新一期）；
+    缺少资产总计行时返回None，由调用方回退到大模型提取
+    """
+    values, header = table_to_frame(table.get("data") or [[]], table.get("header_rows", 1))
+    if values is None:
+        return None
+    col = latest_period_column(header)
+    latest = values[col]
+    if "资产总计" not in latest.index or pd.isna(latest["资产总计"]):
+        return None
+
+    def _value(*labels):
+        for label in labels:
+            if label in latest.index and not pd.isna(latest[label]):
+                return float(latest[label])
+        return 0.0
+
+    return {
+        "其他应收款": _value("其他应收款", "其他应收款合计"),
+        "存货": _value("存货"),
+        "流动资产": _value("流动资产", "流动资产合计"),
+        "资产总计": _value("资产总计"),
+        "报告截至日期": format_period(extract_date(header[col]) or table.get("date")),
+    }
+
+
+def extract_interest_bearing_debt(table):
+    """
+    从有息负债期限结构表中直接提取短期债务（合计行一年以内列）、有息负债总额（合计行合计列）及统计时间；
+    合计行或期限列无法唯一定位时返回None，由调用方回退到大模型提取
+    """
+    values, header = table_to_frame(table.get("data") or [[]], table.get("header_rows", 1))
+    if values is None:
+        return None
+    total_rows = [label for label in values.index if DEBT_TOTAL_ROW_PATTERN.match(label)]
+    short_cols = [idx for idx, cell in enumerate(header) if SHORT_TERM_COL_PATTERN.search(cell)]
+    total_cols = [idx for idx, cell in enumerate(header) if TOTAL_COL_PATTERN.search(cell)]
+    if len(total_rows) != 1 or len(short_cols) != 1 or len(total_cols) != 1:
+        return None
+    total_row = values.loc[total_rows[0]]
+    short_term_debt, interest_bearing_debt = total_row[short_cols[0]], total_row[total_cols[0]]
+    if pd.isna(short_term_debt) or pd.isna(interest_bearing_debt):
+        return None
+    debt_date = extract_date(table.get("preceding_text") or "") or extract_date("".join(header)) or table.get("date")
+    return {
+        "短期债务": float(short_term_debt),
+        "有息负债总额": float(interest_bearing_debt),
+        "统计时间": format_period(debt_date),
+    }
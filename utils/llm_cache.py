@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from config.config import LLM_CACHE_CONFIG
+from utils.log_utils import get_logger
+
+logger = get_logger()
+
+
+class LLMCache:
+    """
+    大模型结果磁盘缓存（SQLite）
+    Key: 模型名称 + 规范化消息 + 采样参数 的sha256
+    淘汰: 超过有效期删除，超过最大条数按最近访问时间淘汰
+    """
+
+    def __init__(self, path=None, ttl=None, max_entries=None, bypass=None):
+        self.path = str(path or LLM_CACHE_CONFIG.get("path"))
+        self.ttl = ttl if ttl is not None else LLM_CACHE_CONFIG.get("ttl")
+        self.max_entries = max_entries if max_entries is not None else LLM_CACHE_CONFIG.get("max_entries")
+        if bypass is None:
+            bypass = LLM_CACHE_CONFIG.get("bypass") or os.environ.get("LLM_CACHE_BYPASS", "") in ("1", "true", "True")
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _get_conn(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT,
+                    created_at REAL,
+                    accessed_at REAL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(model, messages, **params):
+        """根据模型、规范化后的消息和采样参数生成缓存Key"""
+        norm_messages = [{"role": message.get("role"), "content": str(message.get("content", "")).strip()}
+                         for message in messages]
+        norm_params = {k: v for k, v in params.items() if v is not None}
+        raw = json.dumps({"model": model, "messages": norm_messages, "params": norm_params},
+                         ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        if self.bypass:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def delete(self, key):
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            conn.commit()
+
+    def _get_valid(self, key, validate):
+        """读取缓存，校验不通过的结果视为未命中并删除"""
+        try:
+            cached = self.get(key)
+            if cached is not None and validate is not None and not validate(cached):
+                self.hits -= 1
+                self.misses += 1
+                self.delete(key)
+                cached = None
+        except sqlite3.Error as e:
+            logger.error(f"读取大模型缓存失败：{e}")
+            cached = None
+        return cached
+
+    def _set_valid(self, key, model, response, validate):
+        """写入缓存，校验不通过的结果不写入，避免重复回放错误结果"""
+        if validate is not None and not validate(response):
+            return
+        try:
+            self.set(key, model, response)
+        except sqlite3.Error as e:
+            logger.error(f"写入大模型缓存失败：{e}")
+
+    def set(self, key, model, response):
+        if self.bypass or not response:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("INSERT OR REPLACE INTO llm_cache(key, model, response, created_at, accessed_at) "
+                         "VALUES (?, ?, ?, ?, ?)", (key, model, response, now, now))
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn, now):
+        if self.ttl:
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        if self.max_entries:
+            count = conn.execute("SELECT COUNT(1) FROM llm_cache").fetchone()[0]
+            if count > self.max_entries:
+                conn.execute("DELETE FROM llm_cache WHERE key IN "
+                             "(SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)", (count - self.max_entries,))
+
+    def get_or_call(self, model, messages, func, validate=None, **params):
+        """
+        命中缓存直接返回，否则调用func()获取结果并写入缓存
+        :param func: 无参函数，返回大模型结果文本
+        :param validate: 结果校验函数，返回False的结果不写入缓存，已缓存的视为未命中
+        """
+        if self.bypass:
+            return func()
+        key = self.make_key(model, messages, **params)
+        cached = self._get_valid(key, validate)
+        if cached is not None:
+            return cached
+        response = func()
+        self._set_valid(key, model, response, validate)
+        return response
+
+    async def aget_or_call(self, model, messages, coro_func, validate=None, **params):
+        """
+        get_or_call的异步版本
+        :param coro_func: 无参异步函数，返回大模型结果文本
+        """
+        if self.bypass:
+            return await coro_func()
+        key = self.make_key(model, messages, **params)
+        cached = self._get_valid(key, validate)
+        if cached is not None:
+            return cached
+        response = await coro_func()
+        self._set_valid(key, model, response, validate)
+        return response
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 4) if total else 0}
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """进程内共享的缓存实例"""
+    global _llm_cache
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMCache()
+    return _llm_cache
@@ -1,8 +1,10 @@
 import time
-from openai import OpenAI
 import logging
 import os
 
+from utils import llm_gateway
+from utils.llm_gateway import get_client
+
 class LLMClient:
     def __init__(self, config):
         self.logger = logging.getLogger("LLMClient")
@@ -11,34 +13,25 @@ class LLMClient:
 
     def _init_openai_client(self):
         curr_env = os.getenv("CURRENT_ENV", "dev")
-        openai_api_base = self.config.get("base_url")
         openai_header_auth = self.config.get("authorization")
-        openai_api_key = "EMPTY"
 
         if openai_header_auth is None:
             raise ValueError(f"API key for {curr_env} environment is missing.")
-        client = OpenAI(
-            api_key=openai_api_key,
-            base_url=openai_api_base,
-            default_headers={
-                "Authorization": f"Bearer {openai_header_auth}"
-            }
-        )
+        # 共享网关客户端及连接池
+        client = get_client(self.config)
         self.logger.info("LLM客户端创建成功")
         return client
 
 
     def generate(self, prompts, temperature=0):
-        # 提取文本信息
+        # 提取文本信息，经网关调用（共享连接池、磁盘缓存及调用追踪）
         try:
-            response = self.client.chat.completions.create(
-                model=self.config.get("model"),
-                messages=prompts,
+            return llm_gateway.generate(
+                prompts,
+                endpoint=self.config,
                 temperature=temperature,
                 response_format={"type": "json_object"},
                 # timeout=30
             )
-            # return response.choices[0].message.content
-            return response.choices[0].message.reasoning_content
         except Exception as e:
             raise Exception(f"An error occurred while calling OpenAI API: {e}")
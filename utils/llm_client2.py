@@ -1,5 +1,4 @@
 
-from openai import OpenAI
 import logging
 from typing import Generator, Union
 from pathlib import Path
@@ -7,6 +6,9 @@ import sys
 project_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(project_root))
 from config.config import LLM_CONFIG
+from utils.llm_gateway import get_client
+from utils.llm_cache import get_llm_cache
+from utils.llm_trace import trace_llm_call
 
 class LLMClient:
     def __init__(self, config):
@@ -16,19 +18,12 @@ class LLMClient:
 
     def _init_openai_client(self):
         curr_env = self.config.get("current_env", "dev")
-        openai_api_base = self.config.get("base_url")
         openai_header_auth = self.config.get("authorization")
-        openai_api_key = "EMPTY"
 
         if openai_header_auth is None:
             raise ValueError(f"API key for {curr_env} environment is missing.")
-        client = OpenAI(
-            api_key=openai_api_key,
-            base_url=openai_api_base,
-            default_headers={
-                "Authorization": f"Bearer {openai_header_auth}"
-            }
-        )
+        # 共享网关客户端及连接池
+        client = get_client(self.config)
         self.logger.info("LLM客户端创建成功")
         return client
 
@@ -42,24 +37,38 @@ class LLMClient:
 
     def generate_stream(self, prompts, temperature=0) -> Generator[str, None, None]:
         """
-        流式生成响应
+        流式生成响应，命中缓存时一次性返回缓存内容
         """
-        try:
-            stream = self.client.chat.completions.create(
-                model=self.config.get("model"),
-                messages=prompts,
-                temperature=temperature,
-                response_format={"type": "json_object"},
-                stream=True  # 开启流式传输
-            )
-
-            for chunk in stream:
-                # 提取流式响应中的内容
-                if chunk.choices[0].delta.content is not None:
-                    yield chunk.choices[0].delta.content
-
-        except Exception as e:
-            raise Exception(f"An error occurred while calling OpenAI API (streaming): {e}")
+        llm_cache = get_llm_cache()
+        model = self.config.get("model")
+        cache_params = {"temperature": temperature, "response_format": {"type": "json_object"}}
+        cache_key = llm_cache.make_key(model, prompts, **cache_params)
+        with trace_llm_call(model, prompts) as call:
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+            try:
+                call["called"] = True
+                stream = self.client.chat.completions.create(
+                    model=model,
+                    messages=prompts,
+                    temperature=temperature,
+                    response_format={"type": "json_object"},
+                    stream=True  # 开启流式传输
+                )
+
+                complete_content = ""
+                for chunk in stream:
+                    # 提取流式响应中的内容
+                    if chunk.choices[0].delta.content is not None:
+                        complete_content += chunk.choices[0].delta.content
+                        yield chunk.choices[0].delta.content
+                call["content"] = complete_content
+                llm_cache.set(cache_key, model, complete_content)
+
+            except Exception as e:
+                raise Exception(f"An error occurred while calling OpenAI API (streaming): {e}")
 
     # def generate(self, prompts, temperature=0) -> Union[str, Generator[str, None, None]]:
     #     """
@@ -80,7 +89,8 @@ class LLMClient:
         """
         使用流式API但返回完整内容
         """
-        try:
+        def _call():
+            call["called"] = True
             stream = self.client.chat.completions.create(
                 model=self.config.get("model"),
                 messages=prompts,
@@ -94,8 +104,14 @@ class LLMClient:
                 if chunk.choices[0].delta.content is not None:
                     complete_content += chunk.choices[0].delta.content
 
+            call["content"] = complete_content
             return complete_content
 
+        try:
+            with trace_llm_call(self.config.get("model"), prompts) as call:
+                return get_llm_cache().get_or_call(self.config.get("model"), prompts, _call,
+                                                   temperature=temperature, response_format={"type": "json_object"})
+
         except Exception as e:
             raise Exception(f"An error occurred while calling OpenAI API (streaming complete): {e}")
 
@@ -0,0 +1,137 @@
+"""
+进程级大模型网关：按服务地址共享OpenAI客户端及httpx连接池（长连接，可用时启用HTTP/2），
+提供同步 generate 和异步 agenerate 入口，结果统一走磁盘缓存并记录调用追踪
+"""
+import asyncio
+import threading
+import weakref
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from config.config import LLM_GATEWAY_CONFIG
+from config.llm_config import CURR_ENV, ENV_CONFIG
+from utils.llm_cache import get_llm_cache
+from utils.llm_trace import trace_llm_call
+
+_lock = threading.Lock()
+_sync_clients = {}
+# 异步连接池绑定事件循环，按事件循环分别维护，循环销毁后随之释放
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def default_endpoint():
+    """当前环境的大模型服务配置，含base_url、authorization、model"""
+    return ENV_CONFIG.get(CURR_ENV)
+
+
+def _http2_enabled():
+    if not LLM_GATEWAY_CONFIG.get("http2", True):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _http_client_kwargs():
+    return {
+        "limits": httpx.Limits(
+            max_connections=LLM_GATEWAY_CONFIG["max_connections"],
+            max_keepalive_connections=LLM_GATEWAY_CONFIG["max_keepalive_connections"],
+            keepalive_expiry=LLM_GATEWAY_CONFIG["keepalive_expiry"],
+        ),
+        "timeout": httpx.Timeout(LLM_GATEWAY_CONFIG["timeout"], connect=LLM_GATEWAY_CONFIG["connect_timeout"]),
+        "http2": _http2_enabled(),
+    }
+
+
+def _openai_kwargs(endpoint):
+    return {
+        "api_key": "EMPTY",
+        "base_url": endpoint.get("base_url"),
+        "default_headers": {"Authorization": f"Bearer {endpoint.get('authorization')}"},
+        "max_retries": LLM_GATEWAY_CONFIG["max_retries"],
+    }
+
+
+def _endpoint_key(endpoint):
+    return endpoint.get("base_url"), endpoint.get("authorization")
+
+
+def get_client(endpoint=None):
+    """获取共享的同步客户端"""
+    endpoint = endpoint or default_endpoint()
+    key = _endpoint_key(endpoint)
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None:
+            client = OpenAI(http_client=httpx.Client(**_http_client_kwargs()), **_openai_kwargs(endpoint))
+            _sync_clients[key] = client
+    return client
+
+
+def get_async_client(endpoint=None):
+    """获取当前事件循环下共享的异步客户端，需在事件循环中调用"""
+    endpoint = endpoint or default_endpoint()
+    key = _endpoint_key(endpoint)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            client = AsyncOpenAI(http_client=httpx.AsyncClient(**_http_client_kwargs()), **_openai_kwargs(endpoint))
+            loop_clients[key] = client
+    return client
+
+
+def generate(messages, endpoint=None, model=None, validate=None, **params):
+    """
+    同步调用大模型，返回结果文本
+    :param validate: 结果校验函数，校验不通过的结果不写入缓存
+    """
+    endpoint = endpoint or default_endpoint()
+    model = model or endpoint.get("model")
+
+    with trace_llm_call(model, messages) as call:
+        def _call():
+            call["called"] = True
+            raw_response = get_client(endpoint).chat.completions.with_raw_response.create(
+                model=model, messages=messages, **params)
+            call["retries"] = getattr(raw_response, "retries_taken", 0)
+            response = raw_response.parse()
+            call["usage"] = response.usage
+            return response.choices[0].message.content
+
+        return get_llm_cache().get_or_call(model, messages, _call, validate=validate, **params)
+
+
+async def agenerate(messages, endpoint=None, model=None, validate=None, **params):
+    """
+    异步调用大模型，返回结果文本
+    :param validate: 结果校验函数，校验不通过的结果不写入缓存
+    """
+    endpoint = endpoint or default_endpoint()
+    model = model or endpoint.get("model")
+
+    with trace_llm_call(model, messages) as call:
+        async def _call():
+            call["called"] = True
+            raw_response = await get_async_client(endpoint).chat.completions.with_raw_response.create(
+                model=model, messages=messages, **params)
+            call["retries"] = getattr(raw_response, "retries_taken", 0)
+            response = raw_response.parse()
+            call["usage"] = response.usage
+            return response.choices[0].message.content
+
+        return await get_llm_cache().aget_or_call(model, messages, _call, validate=validate, **params)
+
+
+def close():
+    """关闭同步客户端连接池，进程退出前调用"""
+    with _lock:
+        clients = list(_sync_clients.values())
+        _sync_clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,163 @@
+"""
+大模型调用追踪：按任务记录每次调用的调用位置、所处阶段、token数、耗时、重试次数及缓存命中情况，
+任务结束时输出JSON追踪文件及汇总信息；未开启追踪时不做任何记录
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from utils.prompt_packer import count_tokens
+
+# 识别调用位置时跳过的封装层
+WRAPPER_MODULES = ("utils.llm_gateway", "utils.llm_cache", "utils.llm_trace", "utils.llm_client", "utils.llm_client2",
+                   "contextlib", "concurrent.futures.thread", "threading")
+WRAPPER_FUNCS = {"_chat_completion", "generate", "agenerate", "_call"}
+
+# 当前任务的追踪，按上下文隔离，并发处理多个任务时互不干扰
+_current_trace = ContextVar("llm_trace", default=None)
+
+
+class LLMTrace:
+    def __init__(self, task_id=None):
+        self.task_id = task_id
+        self.started_at = time.time()
+        self.current_stage = None
+        self.stages = []
+        self.records = []
+        self._lock = threading.Lock()
+
+    def record(self, **fields):
+        fields.setdefault("stage", self.current_stage)
+        with self._lock:
+            self.records.append(fields)
+
+    @contextmanager
+    def stage(self, name):
+        """标记处理阶段，阶段内的调用归属该阶段，并记录阶段耗时"""
+        self.current_stage = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append({"stage": name, "latency": round(time.perf_counter() - start, 3)})
+            self.current_stage = None
+
+    def summary(self):
+        """按调用位置汇总调用次数、缓存命中、token数及耗时"""
+        with self._lock:
+            records = list(self.records)
+        by_site = {}
+        for record in records:
+            site = by_site.setdefault(record["site"], {"calls": 0, "cache_hits": 0, "errors": 0, "retries": 0,
+                                                        "prompt_tokens": 0, "completion_tokens": 0, "latency": 0.0})
+            site["calls"] += 1
+            site["cache_hits"] += int(record["cache_hit"])
+            site["errors"] += int(record["error"] is not None)
+            site["retries"] += record["retries"]
+            site["prompt_tokens"] += record["prompt_tokens"] or 0
+            site["completion_tokens"] += record["completion_tokens"] or 0
+            site["latency"] = round(site["latency"] + record["latency"], 3)
+        total = {key: sum(site[key] for site in by_site.values())
+                 for key in ("calls", "cache_hits", "errors", "retries", "prompt_tokens", "completion_tokens")}
+        total["latency"] = round(sum(site["latency"] for site in by_site.values()), 3)
+        total["wall_time"] = round(time.time() - self.started_at, 3)
+        stages = [{**stage, "calls": sum(1 for record in records if record["stage"] == stage["stage"])}
+                  for stage in self.stages]
+        return {
+            "total": total,
+            "stages": stages,
+            "by_site": dict(sorted(by_site.items(), key=lambda item: -item[1]["latency"])),
+        }
+
+    def dump(self, path):
+        with self._lock:
+            records = list(self.records)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"task_id": self.task_id, "summary": self.summary(), "records": records}, f,
+                      ensure_ascii=False, indent=2)
+
+
+def start_trace(task_id=None):
+    """开启当前上下文的任务追踪"""
+    trace = LLMTrace(task_id)
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace(path=None):
+    """结束任务追踪，指定path时写出追踪文件，返回汇总信息"""
+    trace = _current_trace.get()
+    _current_trace.set(None)
+    if trace is None:
+        return None
+    if path:
+        trace.dump(path)
+    return trace.summary()
+
+
+def get_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_stage(name):
+    """标记当前任务的处理阶段，未开启追踪时为空操作"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.stage(name):
+        yield
+
+
+def call_site():
+    """向上查找业务调用位置，形如 类名.方法名"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        func_name = frame.f_code.co_name
+        if module not in WRAPPER_MODULES and func_name not in WRAPPER_FUNCS and not func_name.startswith("<"):
+            owner = frame.f_locals.get("self")
+            return f"{type(owner).__name__}.{func_name}" if owner is not None else f"{module}.{func_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _message_tokens(messages):
+    return sum(count_tokens(str(message.get("content", ""))) for message in messages or [])
+
+
+@contextmanager
+def trace_llm_call(model, messages=None):
+    """
+    追踪一次大模型调用，实际请求接口时由调用方在返回的字典中填写：
+    called（是否实际请求）、usage（接口返回的token用量）、retries（重试次数）、content（流式结果，用于估算token）
+    """
+    call = {"called": False, "usage": None, "retries": 0, "content": None}
+    trace = _current_trace.get()
+    if trace is None:
+        yield call
+        return
+    site = call_site()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield call
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        usage = call["usage"]
+        prompt_tokens, completion_tokens = None, None
+        if usage is not None:
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+        elif call["called"]:
+            # 流式接口无用量信息时估算
+            prompt_tokens = _message_tokens(messages)
+            completion_tokens = count_tokens(call["content"] or "")
+        trace.record(site=site, model=model, latency=round(time.perf_counter() - start, 3),
+                     prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, retries=call["retries"],
+                     cache_hit=not call["called"] and error is None, error=error)
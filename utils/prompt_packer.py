@@ -0,0 +1,126 @@
+"""
+提示词打包：将检索结果（文本、表格、章节段落）紧凑序列化，
+按Qwen分词器计数，在token预算内按相关度装入，替代按字符截断原始repr
+"""
+import re
+from functools import lru_cache
+
+from config.config import PROMPT_PACK_CONFIG
+from utils.log_utils import get_logger
+
+logger = get_logger()
+
+CJK_PATTERN = re.compile(r"[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]")
+BLANK_PATTERN = re.compile(r"[ \t\r\f\v]+")
+TABLE_META_LABELS = (("name", "表名"), ("date", "日期"), ("unit", "单位"))
+
+
+@lru_cache(maxsize=1)
+def _load_tokenizer():
+    tokenizer_path = PROMPT_PACK_CONFIG.get("tokenizer_path")
+    if not tokenizer_path:
+        return None
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(tokenizer_path, trust_remote_code=True)
+    except Exception as e:
+        logger.warning(f"加载分词器失败，按字符估算token数：{e}")
+        return None
+
+
+def count_tokens(text):
+    """统计token数；无分词器时中文字符按1个、其他字符按4个折合1个估算"""
+    tokenizer = _load_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    cjk_count = len(CJK_PATTERN.findall(text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+
+def truncate_tokens(text, budget):
+    """按token预算截断文本"""
+    if budget <= 0:
+        return ""
+    tokenizer = _load_tokenizer()
+    if tokenizer is not None:
+        token_ids = tokenizer.encode(text, add_special_tokens=False)
+        return text if len(token_ids) <= budget else tokenizer.decode(token_ids[:budget])
+    # 二分查找满足预算的最长前缀
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def _format_cell(cell):
+    return BLANK_PATTERN.sub(" ", str(cell)).replace("\n", " ").strip()
+
+
+def _serialize_rows(rows):
+    """二维表格转为TSV"""
+    return "\n".join("\t".join(_format_cell(cell) for cell in row) for row in rows)
+
+
+def serialize(item):
+    """
+    紧凑序列化检索结果：
+    表格字典输出标题行（名称、日期、单位）加TSV，段落字典只取正文，二维列表转TSV，字符串压缩空白
+    """
+    if item is None:
+        return ""
+    if isinstance(item, str):
+        return BLANK_PATTERN.sub(" ", item).strip()
+    if isinstance(item, dict):
+        if isinstance(item.get("data"), list):
+            meta = "，".join(f"{label}：{item[key]}" for key, label in TABLE_META_LABELS if item.get(key))
+            caption = item.get("preceding_text") or ""
+            head = "\n".join(part for part in (f"【{meta}】" if meta else "", serialize(caption)) if part)
+            return "\n".join(part for part in (head, _serialize_rows(item["data"])) if part)
+        if "content" in item:
+            return serialize(item["content"])
+        return "\n".join(f"{key}：{serialize(value)}" for key, value in item.items() if key != "oxml")
+    if isinstance(item, (list, tuple)):
+        if item and all(isinstance(row, (list, tuple)) for row in item):
+            return _serialize_rows(item)
+        return "\n".join(text for text in (serialize(sub_item) for sub_item in item) if text)
+    return str(item)
+
+
+def _relevance(text, keyword_patterns):
+    return sum(len(pattern.findall(text)) for pattern in keyword_patterns)
+
+
+def pack_prompt(items, budget=None, keywords=None):
+    """
+    在token预算内打包检索结果
+    :param items: 检索结果列表或单个结果
+    :param budget: token预算，默认取配置
+    :param keywords: 相关度关键词（正则），命中越多越优先装入；为空时按原顺序装入
+    :return: 打包后的文本，各条目保持原顺序
+    """
+    budget = budget or PROMPT_PACK_CONFIG["default_budget"]
+    if not isinstance(items, (list, tuple)) or (items and all(isinstance(row, (list, tuple)) for row in items)):
+        items = [items]
+    texts = [text for text in (serialize(item) for item in items) if text]
+    keyword_patterns = [re.compile(keyword) for keyword in keywords or []]
+    order = sorted(range(len(texts)), key=lambda idx: -_relevance(texts[idx], keyword_patterns)) \
+        if keyword_patterns else range(len(texts))
+
+    selected = {}
+    remaining = budget
+    for idx in order:
+        tokens = count_tokens(texts[idx]) + 1
+        if tokens <= remaining:
+            selected[idx] = texts[idx]
+            remaining -= tokens
+        elif not selected:
+            # 最相关的条目超出预算时截断装入，避免结果为空
+            selected[idx] = truncate_tokens(texts[idx], remaining)
+            remaining = 0
+        if remaining <= 0:
+            break
+    return "\n".join(selected[idx] for idx in sorted(selected))
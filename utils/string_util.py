@@ -83,3 +83,60 @@ def convert_val(txt):
         conv = round(val / 10000, 2)
         txt = txt.replace(val_txt, str(conv)+"亿元", 1)
     return txt
+
+
+# 金额单位换算为亿元的系数
+UNIT_TO_YI_SCALES = {"千万": 0.1, "百万": 0.01, "千元": 0.00001, "亿": 1, "万": 0.0001, "元": 0.00000001}
+AMOUNT_PATTERN = re.compile(r"^\s*([-+]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?|[-+]?\.\d+)\s*(亿元|亿|万元|万|元)?\s*$")
+DATE_KEY_PATTERN = re.compile(r"日期|时间|年份|期间")
+
+
+def unit_scale(unit):
+    """
+    金额单位换算为亿元的系数，无法识别的单位返回None
+    :param unit: 单位文本，如 万元、亿元、%、万元、亩
+    """
+    if not unit:
+        return None
+    for _unit in ("千万", "百万", "千元"):
+        if _unit in unit:
+            return UNIT_TO_YI_SCALES[_unit]
+    _unit = extract_unit(unit)
+    if _unit is None or _unit[0] not in UNIT_TO_YI_SCALES:
+        return None
+    return UNIT_TO_YI_SCALES[_unit[0]]
+
+
+def parse_amount(val):
+    """解析金额文本（支持千分位、单位后缀），返回(数值, 单位后缀)，非金额返回None"""
+    match = AMOUNT_PATTERN.match(val)
+    if not match:
+        return None
+    return float(match.group(1).replace(",", "")), match.group(2)
+
+
+def normalize_amounts(obj, unit):
+    """
+    将JSON数据中的金额统一换算为亿元，日期类字段不处理
+    :param obj: 大模型提取的JSON数据（dict/list/数值/文本）
+    :param unit: 数据原单位，金额文本自带单位后缀时以后缀为准
+    :return: 换算后的数据
+    """
+    scale = unit_scale(unit)
+    if isinstance(obj, dict):
+        return {key: val if DATE_KEY_PATTERN.search(str(key)) else normalize_amounts(val, unit)
+                for key, val in obj.items()}
+    if isinstance(obj, list):
+        return [normalize_amounts(val, unit) for val in obj]
+    if isinstance(obj, bool) or obj is None:
+        return obj
+    if isinstance(obj, (int, float)):
+        return round(obj * scale, 6) if scale is not None else obj
+    if isinstance(obj, str):
+        amount = parse_amount(obj)
+        if amount is None:
+            return obj
+        val, val_unit = amount
+        val_scale = unit_scale(val_unit) if val_unit else scale
+        return round(val * val_scale, 6) if val_scale is not None else obj
+    return obj
@@ -0,0 +1,75 @@
+import re
+from collections import defaultdict
+
+# 正则元字符，不含元字符的关键词按子串匹配
+REGEX_META_PATTERN = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+def _bigrams(text):
+    return {text[idx:idx + 2] for idx in range(len(text) - 1)}
+
+
+class TitleIndex:
+    """
+    面包屑标题索引，标题列表构建一次；
+    标题按单字及相邻二字切分为倒排索引（词项 -> 标题位置），普通关键词通过倒排索引求交后校验，
+    含正则元字符的关键词逐个标题匹配；关键词匹配结果缓存，过滤视图（如剔除增信标题）预先计算
+    """
+
+    def __init__(self, titles, exclude_views=None):
+        """
+        :param titles: 有序标题列表
+        :param exclude_views: {视图名称: 需剔除标题的关键词列表}
+        """
+        self.titles = list(titles)
+        self._postings = defaultdict(set)
+        for idx, title in enumerate(self.titles):
+            for term in set(title) | _bigrams(title):
+                self._postings[term].add(idx)
+        self._keyword_positions = {}
+        self._excluded_positions = {}
+        for view, view_keywords in (exclude_views or {}).items():
+            self._excluded_positions[view] = self._match_positions(view_keywords)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _literal_positions(self, keyword):
+        """普通关键词：倒排索引求交得到候选标题，再校验子串"""
+        if not keyword:
+            return frozenset(range(len(self.titles)))
+        terms = _bigrams(keyword) or {keyword}
+        postings = sorted((self._postings.get(term, set()) for term in terms), key=len)
+        candidates = set.intersection(*postings)
+        return frozenset(idx for idx in candidates if keyword in self.titles[idx])
+
+    def _regex_positions(self, keyword):
+        pattern = re.compile(rf"{keyword}")
+        return frozenset(idx for idx, title in enumerate(self.titles) if pattern.search(title))
+
+    def _keyword_match_positions(self, keyword):
+        positions = self._keyword_positions.get(keyword)
+        if positions is None:
+            if REGEX_META_PATTERN.search(keyword):
+                positions = self._regex_positions(keyword)
+            else:
+                positions = self._literal_positions(keyword)
+            self._keyword_positions[keyword] = positions
+        return positions
+
+    def _match_positions(self, keywords):
+        positions = set()
+        for keyword in keywords:
+            positions |= self._keyword_match_positions(keyword)
+        return positions
+
+    def search(self, keywords, view=None):
+        """
+        按标题顺序返回命中任一关键词的标题
+        :param keywords: 关键词（正则）列表
+        :param view: 过滤视图名称，为None时不过滤
+        """
+        positions = self._match_positions(keywords)
+        if view is not None:
+            positions -= self._excluded_positions.get(view, set())
+        return [self.titles[idx] for idx in sorted(positions)]
@@ -0,0 +1,172 @@
+"""
+常驻工作进程：监听任务投递目录或本地socket接收任务目录路径，并发生成报告；
+进程内共享数据库连接池、大模型客户端及缓存，避免每个任务重复启动和初始化，
+每个任务的response.json与main.py输出一致
+
+用法：
+    python worker_service.py                      # 同时监听投递目录和socket
+    python worker_service.py --no-socket          # 只监听投递目录
+    python worker_service.py --submit TASK_DIR    # 通过socket投递任务
+"""
+import argparse
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.config import WORKER_CONFIG
+from main import process_task
+from utils.log_utils import get_logger
+
+logger = get_logger()
+
+# 投递文件状态后缀
+TASK_SUFFIX = ".task"
+RUNNING_SUFFIX = ".running"
+DONE_SUFFIX = ".done"
+FAILED_SUFFIX = ".failed"
+
+
+class ReportWorker:
+    def __init__(self, max_concurrent_tasks=None, spool_dir=None, poll_interval=None):
+        self.max_concurrent_tasks = max_concurrent_tasks or WORKER_CONFIG["max_concurrent_tasks"]
+        self.spool_dir = str(spool_dir or WORKER_CONFIG["spool_dir"])
+        self.poll_interval = poll_interval or WORKER_CONFIG["poll_interval"]
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrent_tasks, thread_name_prefix="report")
+        self._running_dirs = set()
+        self._lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def submit(self, task_dir, on_done=None):
+        """
+        提交任务，同一任务目录处理中时不重复提交
+        :param on_done: 任务结束回调，参数为是否成功
+        :return: 是否已提交
+        """
+        task_dir = os.path.abspath(task_dir)
+        if not os.path.isfile(os.path.join(task_dir, "request.json")):
+            logger.error(f"任务目录缺少request.json：{task_dir}")
+            return False
+        with self._lock:
+            if task_dir in self._running_dirs:
+                logger.info(f"任务处理中，忽略重复提交：{task_dir}")
+                return False
+            self._running_dirs.add(task_dir)
+        self.executor.submit(self._run, task_dir, on_done)
+        logger.info(f"任务已提交：{task_dir}")
+        return True
+
+    def _run(self, task_dir, on_done):
+        succeed = False
+        try:
+            response = process_task(task_dir)
+            succeed = response.get("resCode") == 1
+        except Exception as e:
+            logger.exception(f"任务处理异常：{task_dir}，{e}")
+        finally:
+            with self._lock:
+                self._running_dirs.discard(task_dir)
+            if on_done is not None:
+                on_done(succeed)
+
+    def watch_spool(self):
+        """轮询投递目录，领取 *.task 文件（重命名为 .running）并提交，结束后标记为 .done/.failed"""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        logger.info(f"监听任务投递目录：{self.spool_dir}")
+        while not self.stop_event.is_set():
+            for file_name in sorted(os.listdir(self.spool_dir)):
+                if not file_name.endswith(TASK_SUFFIX):
+                    continue
+                task_file = os.path.join(self.spool_dir, file_name)
+                running_file = task_file[:-len(TASK_SUFFIX)] + RUNNING_SUFFIX
+                try:
+                    # 重命名即领取，多个工作进程共用目录时不会重复处理
+                    os.rename(task_file, running_file)
+                except OSError:
+                    continue
+                with open(running_file, "r", encoding="utf-8") as f:
+                    task_dir = f.read().strip()
+                if not self.submit(task_dir, on_done=self._spool_callback(running_file)):
+                    os.rename(running_file, running_file[:-len(RUNNING_SUFFIX)] + FAILED_SUFFIX)
+            self.stop_event.wait(self.poll_interval)
+
+    @staticmethod
+    def _spool_callback(running_file):
+        def _on_done(succeed):
+            suffix = DONE_SUFFIX if succeed else FAILED_SUFFIX
+            os.rename(running_file, running_file[:-len(RUNNING_SUFFIX)] + suffix)
+
+        return _on_done
+
+    def serve_socket(self, host=None, port=None):
+        """监听本地socket，每行一个任务目录路径，逐行回复 accepted/rejected"""
+        worker = self
+
+        class TaskHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    task_dir = line.decode("utf-8").strip()
+                    if not task_dir:
+                        continue
+                    reply = "accepted" if worker.submit(task_dir) else "rejected"
+                    self.wfile.write(f"{reply} {task_dir}\n".encode("utf-8"))
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        server = socketserver.ThreadingTCPServer((host or WORKER_CONFIG["host"], port or WORKER_CONFIG["port"]),
+                                                 TaskHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"监听任务socket：{server.server_address}")
+        return server
+
+    def stop(self, wait=True):
+        """停止领取新任务，等待处理中的任务完成"""
+        self.stop_event.set()
+        self.executor.shutdown(wait=wait)
+
+
+def submit_task(task_dir, host=None, port=None):
+    """通过socket向工作进程投递任务，返回工作进程的回复"""
+    with socket.create_connection((host or WORKER_CONFIG["host"], port or WORKER_CONFIG["port"])) as conn:
+        conn.sendall(f"{os.path.abspath(task_dir)}\n".encode("utf-8"))
+        conn.shutdown(socket.SHUT_WR)
+        return conn.makefile("r", encoding="utf-8").readline().strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="报告生成常驻工作进程")
+    parser.add_argument("--workers", type=int, default=None, help="同时处理的最大任务数")
+    parser.add_argument("--spool-dir", default=None, help="任务投递目录")
+    parser.add_argument("--no-spool", action="store_true", help="不监听投递目录")
+    parser.add_argument("--no-socket", action="store_true", help="不监听socket")
+    parser.add_argument("--port", type=int, default=None, help="socket监听端口")
+    parser.add_argument("--submit", default=None, help="向运行中的工作进程投递任务目录")
+    args = parser.parse_args()
+
+    if args.submit:
+        print(submit_task(args.submit, port=args.port))
+        return
+
+    worker = ReportWorker(max_concurrent_tasks=args.workers, spool_dir=args.spool_dir)
+    server = None if args.no_socket else worker.serve_socket(port=args.port)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop_event.set())
+    try:
+        if args.no_spool:
+            while not worker.stop_event.is_set():
+                time.sleep(1)
+        else:
+            worker.watch_spool()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.shutdown()
+        worker.stop()
+        logger.info("工作进程已停止")
+
+
+if __name__ == "__main__":
+    main()